@@ -4,13 +4,70 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, Toplevel
 from database import DatabaseManager
 
+# Espera (ms) desde la última tecla antes de filtrar la búsqueda de stock
+DEBOUNCE_BUSQUEDA_MS = 150
+
+class CarritoVenta:
+    # Carrito de una pestaña de venta, indexado por producto_id y con el total
+    # acumulado. Cada cambio se notifica a los observadores con
+    # (evento, item), donde evento es 'agregado', 'actualizado', 'eliminado'
+    # o 'vaciado' (item None), para que la vista toque sólo la fila afectada.
+    def __init__(self):
+        self.items = {}
+        self.total = 0.0
+        self._observadores = []
+
+    @property
+    def productos(self):
+        return list(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+    def suscribir(self, callback):
+        self._observadores.append(callback)
+
+    def _notificar(self, evento, item):
+        for callback in self._observadores:
+            callback(evento, item)
+
+    def agregar(self, producto, cantidad):
+        item = self.items.get(producto['id'])
+        if item:
+            self.total -= item['subtotal']
+            item['cantidad'] += cantidad
+            evento = 'actualizado'
+        else:
+            item = {
+                'producto_id': producto['id'],
+                'nombre': producto['nombre'],
+                'cantidad': cantidad,
+                'precio_unitario': producto['precio_por_kg']
+            }
+            self.items[producto['id']] = item
+            evento = 'agregado'
+        item['subtotal'] = item['cantidad'] * item['precio_unitario']
+        self.total += item['subtotal']
+        self._notificar(evento, item)
+
+    def quitar(self, producto_id):
+        item = self.items.pop(producto_id, None)
+        if item:
+            self.total -= item['subtotal']
+            self._notificar('eliminado', item)
+
+    def vaciar(self):
+        self.items.clear()
+        self.total = 0.0
+        self._notificar('vaciado', None)
+
 class SalesUI:
     def __init__(self, parent_frame, db_manager):
         self.parent_frame = parent_frame
         self.db = db_manager
-        self.ventas_data = {1: {'productos': [], 'total': 0.0}}
         self.venta_actual = 1
         self.num_ventas = 1
+        self.ventas_data = {1: self.crear_carrito(1)}
         self.crear_interfaz_ventas()
         self.simular_venta_inicial()
 
@@ -117,7 +174,7 @@ class SalesUI:
 
     def agregar_nueva_venta(self):
         self.num_ventas += 1
-        self.ventas_data[self.num_ventas] = {'productos': [], 'total': 0.0}
+        self.ventas_data[self.num_ventas] = self.crear_carrito(self.num_ventas)
         self.crear_pestana_venta(self.num_ventas)
         self.notebook.select(self.num_ventas - 1)
 
@@ -131,7 +188,7 @@ class SalesUI:
         current_tab_text = self.notebook.tab(current_tab_id, "text")
         num_venta_a_cerrar = int(current_tab_text.split()[-1])
         
-        if self.ventas_data[num_venta_a_cerrar]['productos'] and not messagebox.askyesno(
+        if self.ventas_data[num_venta_a_cerrar] and not messagebox.askyesno(
             "Confirmar Cierre",
             f"La Venta {num_venta_a_cerrar} tiene productos. ¿Desea cerrarla de todas formas?"
         ):
@@ -198,9 +255,8 @@ class SalesUI:
         def on_select_item(event):
             selected_item = tree_stock.focus()
             if selected_item:
-                item_values = tree_stock.item(selected_item, "values")
-                producto_id = int(item_values[0])
-                producto_data = self.db.buscar_producto_por_id(producto_id)
+                # El iid de cada fila es el ID del producto
+                producto_data = self._busqueda['por_id'].get(int(selected_item))
                 if producto_data:
                     dialog.destroy()
                     self.seleccionar_producto_para_venta(self.venta_actual, producto_data)
@@ -209,30 +265,71 @@ class SalesUI:
         
         tree_stock.bind("<Double-1>", on_select_item)
         tree_stock.bind("<Return>", on_select_item)
-        entry_buscar.bind("<KeyRelease>", lambda event: self.filtrar_productos(entry_buscar.get(), tree_stock))
-        
-        self.cargar_productos_en_tabla(tree_stock, self.db.obtener_todos_productos())
+        entry_buscar.bind("<KeyRelease>", lambda event: self.programar_filtro(dialog, entry_buscar, tree_stock))
+        
+        # El catálogo se lee una sola vez al abrir el diálogo
+        productos = self.db.obtener_todos_productos()
+        self._busqueda = {
+            'productos': [(p['nombre'].lower(), p) for p in productos],
+            'por_id': {p['id']: p for p in productos},
+            'texto': '',
+            'resultado': None,
+            'after_id': None,
+        }
+        self._busqueda['resultado'] = self._busqueda['productos']
+        self.cargar_productos_en_tabla(tree_stock, productos)
+
+    def programar_filtro(self, dialog, entry_buscar, treeview):
+        # Reinicia la espera con cada tecla: sólo se filtra cuando se deja de escribir
+        if self._busqueda['after_id']:
+            dialog.after_cancel(self._busqueda['after_id'])
+        self._busqueda['after_id'] = dialog.after(
+            DEBOUNCE_BUSQUEDA_MS, lambda: self.filtrar_productos(entry_buscar.get(), treeview))
 
     def filtrar_productos(self, texto_busqueda, treeview):
-        productos_todos = self.db.obtener_todos_productos()
-        productos_filtrados = [
-            p for p in productos_todos
-            if texto_busqueda.lower() in p['nombre'].lower()
-        ]
-        self.cargar_productos_en_tabla(treeview, productos_filtrados)
+        self._busqueda['after_id'] = None
+        texto = texto_busqueda.lower()
+        if texto == self._busqueda['texto']:
+            return
+
+        # Si el texto creció, el resultado nuevo es un subconjunto del anterior
+        if texto.startswith(self._busqueda['texto']):
+            candidatos = self._busqueda['resultado']
+        else:
+            candidatos = self._busqueda['productos']
+
+        resultado = [(nombre, p) for nombre, p in candidatos if texto in nombre]
+        self._busqueda['texto'] = texto
+        self._busqueda['resultado'] = resultado
+        self.actualizar_tabla_por_diferencia(treeview, [p for _, p in resultado])
+
+    def actualizar_tabla_por_diferencia(self, treeview, productos):
+        # Los resultados conservan el orden del catálogo, así que basta con
+        # borrar las filas que sobran e insertar las que faltan en su posición.
+        visibles = {str(p['id']) for p in productos}
+        sobrantes = [iid for iid in treeview.get_children() if iid not in visibles]
+        if sobrantes:
+            treeview.delete(*sobrantes)
+
+        for indice, producto in enumerate(productos):
+            if not treeview.exists(str(producto['id'])):
+                self.insertar_producto_en_tabla(treeview, producto, indice)
+
+    def insertar_producto_en_tabla(self, treeview, producto, indice="end"):
+        treeview.insert("", indice, iid=str(producto['id']), values=(
+            producto['id'],
+            producto['nombre'],
+            producto['categoria_nombre'],
+            f"${producto['precio_por_kg']:.2f}",
+            f"{producto['stock_actual']:.2f} kg"
+        ))
 
     def cargar_productos_en_tabla(self, treeview, productos):
         for item in treeview.get_children():
             treeview.delete(item)
         
         for producto in productos:
-            treeview.insert("", "end", values=(
-                producto['id'],
-                producto['nombre'],
-                producto['categoria_nombre'],
-                f"${producto['precio_por_kg']:.2f}",
-                f"{producto['stock_actual']:.2f} kg"
-            ))
+            self.insertar_producto_en_tabla(treeview, producto)
 
     def seleccionar_producto_para_venta(self, num_venta, producto):
         cantidad = simpledialog.askfloat(
@@ -247,23 +344,8 @@ class SalesUI:
                 messagebox.showwarning("Stock Insuficiente", f"Stock disponible: {producto['stock_actual']:.2f} kg.")
                 return
             
-            producto_id = producto['id']
-            encontrado = False
-            for item in self.ventas_data[num_venta]['productos']:
-                if item['producto_id'] == producto_id:
-                    item['cantidad'] += cantidad
-                    encontrado = True
-                    break
-            
-            if not encontrado:
-                self.ventas_data[num_venta]['productos'].append({
-                    'producto_id': producto_id,
-                    'nombre': producto['nombre'],
-                    'cantidad': cantidad,
-                    'precio_unitario': producto['precio_por_kg']
-                })
-            
-            self.actualizar_carrito(num_venta)
+            # El carrito notifica el cambio y sólo se actualiza esa fila
+            self.ventas_data[num_venta].agregar(producto, cantidad)
 
     def simular_venta_inicial(self):
         # Simula la carga de algunos productos en la primera venta
@@ -277,42 +359,55 @@ class SalesUI:
             producto = self.db.buscar_producto_por_codigo(item['codigo'])
             if producto:
                 # Añadir producto a la venta sin pedir diálogo
-                producto_id = producto['id']
-                self.ventas_data[1]['productos'].append({
-                    'producto_id': producto_id,
-                    'nombre': producto['nombre'],
-                    'cantidad': item['cantidad'],
-                    'precio_unitario': producto['precio_por_kg']
-                })
+                self.ventas_data[1].agregar(producto, item['cantidad'])
+
+    def crear_carrito(self, num_venta):
+        carrito = CarritoVenta()
+        carrito.suscribir(lambda evento, item: self.on_cambio_carrito(num_venta, evento, item))
+        return carrito
+
+    def valores_fila_carrito(self, item_data):
+        return (
+            item_data['producto_id'],
+            item_data['nombre'],
+            f"{item_data['cantidad']:.2f}",
+            f"${item_data['precio_unitario']:.2f}",
+            f"${item_data['subtotal']:.2f}"
+        )
+
+    def on_cambio_carrito(self, num_venta, evento, item_data):
+        # Los carritos de otras pestañas se dibujan al seleccionarlas
+        if num_venta != self.venta_actual or not hasattr(self, 'tree_carrito'):
+            return
 
-        self.actualizar_carrito(1)
+        if evento == 'agregado':
+            self.tree_carrito.insert("", "end", iid=str(item_data['producto_id']), values=self.valores_fila_carrito(item_data))
+        elif evento == 'actualizado':
+            self.tree_carrito.item(str(item_data['producto_id']), values=self.valores_fila_carrito(item_data))
+        elif evento == 'eliminado':
+            self.tree_carrito.delete(str(item_data['producto_id']))
+        elif evento == 'vaciado':
+            self.tree_carrito.delete(*self.tree_carrito.get_children())
+
+        self.lbl_total_value.config(text=f"${self.ventas_data[num_venta].total:.2f}")
 
     def actualizar_carrito(self, num_venta):
-        for item in self.tree_carrito.get_children():
-            self.tree_carrito.delete(item)
-
-        total_venta = 0
-        for item_data in self.ventas_data[num_venta]['productos']:
-            subtotal = item_data['cantidad'] * item_data['precio_unitario']
-            self.tree_carrito.insert("", "end", values=(
-                item_data['producto_id'],
-                item_data['nombre'],
-                f"{item_data['cantidad']:.2f}",
-                f"${item_data['precio_unitario']:.2f}",
-                f"${subtotal:.2f}"
-            ))
-            total_venta += subtotal
-        
-        self.ventas_data[num_venta]['total'] = total_venta
-        self.lbl_total_value.config(text=f"${total_venta:.2f}")
+        # Dibujo completo: sólo al cambiar de pestaña
+        self.tree_carrito.delete(*self.tree_carrito.get_children())
+
+        carrito = self.ventas_data[num_venta]
+        for item_data in carrito.productos:
+            self.tree_carrito.insert("", "end", iid=str(item_data['producto_id']), values=self.valores_fila_carrito(item_data))
+
+        self.lbl_total_value.config(text=f"${carrito.total:.2f}")
 
     def abrir_ventana_cobro(self):
-        productos_venta = self.ventas_data[self.venta_actual]['productos']
+        productos_venta = self.ventas_data[self.venta_actual].productos
         if not productos_venta:
             messagebox.showwarning("Venta Vacía", "No hay productos en el carrito para cobrar.")
             return
             
-        total_a_cobrar = self.ventas_data[self.venta_actual]['total']
+        total_a_cobrar = self.ventas_data[self.venta_actual].total
         num_items = len(productos_venta)
         
         # Crear la ventana emergente
@@ -432,7 +527,7 @@ class SalesUI:
         if metodo == "Efectivo":
             self.botones_pago[metodo].config(bg="#a5d6a7")
             self.frame_cambio.pack(pady=10)
-            self.calcular_vuelto(self.ventas_data[self.venta_actual]['total'])
+            self.calcular_vuelto(self.ventas_data[self.venta_actual].total)
             self.entry_pago.focus_set()
         else:
             self.frame_cambio.pack_forget()
@@ -465,14 +560,14 @@ class SalesUI:
         if metodo_pago == "Efectivo":
             try:
                 pago = float(self.entry_pago.get())
-                if pago < self.ventas_data[num_venta]['total']:
+                if pago < self.ventas_data[num_venta].total:
                     messagebox.showwarning("Monto Insuficiente", "El monto de pago en efectivo es menor al total de la venta.")
                     return
             except (ValueError, IndexError):
                 messagebox.showwarning("Monto Inválido", "Por favor, ingrese un monto de pago en efectivo válido.")
                 return
 
-        productos_venta = self.ventas_data[num_venta]['productos']
+        productos_venta = self.ventas_data[num_venta].productos
         
         try:
             self.db.crear_venta(productos_venta, metodo_pago)
@@ -497,12 +592,10 @@ class SalesUI:
             messagebox.showerror("Error", f"Ocurrió un error al registrar la venta: {str(e)}")
 
     def cancelar_venta(self, num_venta):
-        if self.ventas_data[num_venta]['productos'] and not messagebox.askyesno(
+        if self.ventas_data[num_venta] and not messagebox.askyesno(
             "Confirmar Cancelación",
             f"¿Desea cancelar la Venta {num_venta}? Se perderán todos los productos agregados."
         ):
             return
 
-        self.ventas_data[num_venta]['productos'] = []
-        self.ventas_data[num_venta]['total'] = 0.0
-        self.actualizar_carrito(num_venta)
\ No newline at end of file
+        self.ventas_data[num_venta].vaciar()
\ No newline at end of file
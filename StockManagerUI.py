@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, Toplevel
 from datetime import datetime
+from carniceria_system.views.virtual_treeview import VirtualTreeview
 
 class StockManagerUI:
     def __init__(self, parent_frame, db_manager):
@@ -72,7 +73,21 @@ class StockManagerUI:
         frame_tabla.pack(pady=10, padx=10, fill="both", expand=True)
 
         columns = ("id", "nombre", "categoria", "precio_por_kg", "stock_actual")
-        tree_productos = ttk.Treeview(frame_tabla, columns=columns, show="headings")
+        # Las filas se cargan por páginas a medida que se desplaza la lista
+        tree_productos = VirtualTreeview(
+            frame_tabla, columns,
+            fetch_page=self.db.obtener_productos_pagina,
+            fetch_page_before=lambda antes_de, limite: self.db.obtener_productos_pagina(limite=limite, antes_de_id=antes_de),
+            format_row=lambda producto: (
+                producto['id'],
+                producto['nombre'],
+                producto['categoria_nombre'],
+                f"${producto['precio_por_kg']:.2f}",
+                f"{producto['stock_actual']:.2f} kg"
+            ),
+            row_key=lambda producto: producto['id'],
+            background=False, # La conexión de DatabaseManager es del hilo de Tkinter
+        )
         tree_productos.heading("id", text="ID")
         tree_productos.heading("nombre", text="Nombre")
         tree_productos.heading("categoria", text="Categoría")
@@ -120,7 +135,20 @@ class StockManagerUI:
         frame_tabla.pack(pady=10, padx=10, fill="both", expand=True)
 
         columns = ("id", "fecha", "peso", "costo_por_kg", "total")
-        tree_historial_media_res = ttk.Treeview(frame_tabla, columns=columns, show="headings")
+        tree_historial_media_res = VirtualTreeview(
+            frame_tabla, columns,
+            fetch_page=self.db.obtener_historial_media_res_pagina,
+            fetch_page_before=lambda antes_de, limite: self.db.obtener_historial_media_res_pagina(limite=limite, antes_de=antes_de),
+            format_row=lambda registro: (
+                registro['id'],
+                registro['fecha'],
+                f"{registro['peso']:.2f}",
+                f"${registro['costo_por_kg']:.2f}",
+                f"${registro['total_media_res']:.2f}"
+            ),
+            row_key=lambda registro: (registro['fecha'], registro['id']),
+            background=False,
+        )
         tree_historial_media_res.heading("id", text="ID")
         tree_historial_media_res.heading("fecha", text="Fecha")
         tree_historial_media_res.heading("peso", text="Peso (kg)")
@@ -135,32 +163,10 @@ class StockManagerUI:
         pass
 
     def cargar_productos_en_tabla(self, treeview):
-        for item in treeview.get_children():
-            treeview.delete(item)
-        
-        productos = self.db.obtener_todos_productos()
-        for producto in productos:
-            treeview.insert("", "end", values=(
-                producto['id'],
-                producto['nombre'],
-                producto['categoria_nombre'],
-                f"${producto['precio_por_kg']:.2f}",
-                f"{producto['stock_actual']:.2f} kg"
-            ))
+        treeview.reload()
 
     def cargar_historial_media_res(self, treeview):
-        for item in treeview.get_children():
-            treeview.delete(item)
-        
         try:
-            historial = self.db.obtener_historial_media_res()
-            for registro in historial:
-                treeview.insert("", "end", values=(
-                    registro['id'],
-                    registro['fecha'],
-                    f"{registro['peso']:.2f}",
-                    f"${registro['costo_por_kg']:.2f}",
-                    f"${registro['total_media_res']:.2f}"
-                ))
+            treeview.reload()
         except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar el historial de media res: {str(e)}")
\ No newline at end of file
+            messagebox.showerror("Error", f"Error al cargar el historial de media res: {str(e)}")
@@ -0,0 +1,239 @@
+import sqlite3
+from ..utils.db_manager import get_connection
+from ..utils.fechas import rango_semiabierto
+
+# --- Dependencia de NumPy ---
+# Los análisis trabajan sobre arreglos de NumPy. Si no está instalado, se
+# necesita: pip install numpy (matplotlib ya lo instala como dependencia).
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Filas que se leen de SQLite en cada tramo al cargar el historial.
+CHUNK_SIZE = 10000
+
+# Códigos numéricos de las formas de pago (índice en la tupla).
+FORMAS_PAGO = ('efectivo', 'transferencia', 'tarjeta')
+
+DIAS_SEMANA = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+# Magnitudes que se pueden sumar en agrupaciones y tablas cruzadas.
+# 'lineas' cuenta las líneas de ticket.
+VALORES = ('subtotal', 'peso', 'lineas')
+
+class VentasColumnar:
+    """
+    Líneas de venta de un período guardadas por columnas en arreglos de NumPy.
+
+    Cada posición corresponde a una línea de ticket (detalle_ventas) junto con
+    los datos de su venta. Las agrupaciones y tablas cruzadas se calculan con
+    operaciones vectorizadas en memoria, sin volver a consultar la base, por
+    lo que conviene cargar el período una vez y pedirle varios análisis.
+
+    Attributes:
+        fecha (ndarray[datetime64[s]]): Fecha y hora de la venta.
+        venta_id, producto_id, empleado_id (ndarray[int64])
+        forma_pago (ndarray[int8]): Índice en FORMAS_PAGO.
+        peso, subtotal (ndarray[float64])
+    """
+    COLUMNAS = ('fecha', 'venta_id', 'producto_id', 'empleado_id', 'forma_pago', 'peso', 'subtotal')
+
+    def __init__(self, fecha, venta_id, producto_id, empleado_id, forma_pago, peso, subtotal):
+        self.fecha = fecha
+        self.venta_id = venta_id
+        self.producto_id = producto_id
+        self.empleado_id = empleado_id
+        self.forma_pago = forma_pago
+        self.peso = peso
+        self.subtotal = subtotal
+
+    def __len__(self):
+        return len(self.fecha)
+
+    @property
+    def dia(self):
+        """Día de cada línea (datetime64[D])."""
+        return self.fecha.astype('datetime64[D]')
+
+    @property
+    def hora(self):
+        """Hora del día de cada línea (0 a 23)."""
+        return ((self.fecha - self.dia) // np.timedelta64(1, 'h')).astype(np.int64)
+
+    @property
+    def dia_semana(self):
+        """Día de la semana de cada línea (0 = lunes, 6 = domingo)."""
+        # El 1970-01-01 (día 0 de datetime64) fue jueves.
+        return (self.dia.astype(np.int64) + 3) % 7
+
+    def columna(self, nombre):
+        """Devuelve una columna o un campo derivado ('dia', 'hora', 'dia_semana') por nombre."""
+        if nombre not in self.COLUMNAS + ('dia', 'hora', 'dia_semana'):
+            raise ValueError(f"Columna desconocida: '{nombre}'.")
+        return getattr(self, nombre)
+
+    def _valores(self, valor):
+        if valor not in VALORES:
+            raise ValueError(f"Valor desconocido: '{valor}'. Opciones: {', '.join(VALORES)}")
+        return None if valor == 'lineas' else getattr(self, valor)
+
+    def filtrar(self, mascara):
+        """
+        Devuelve las líneas donde `mascara` es True (por ejemplo
+        `ventas.filtrar(ventas.forma_pago == FORMAS_PAGO.index('tarjeta'))`).
+        """
+        return VentasColumnar(*(getattr(self, nombre)[mascara] for nombre in self.COLUMNAS))
+
+    def agrupar(self, por, valor='subtotal'):
+        """
+        Suma `valor` agrupando por una columna.
+
+        Args:
+            por (str): Columna de agrupación (ver `columna()`).
+            valor (str): 'subtotal', 'peso' o 'lineas'.
+
+        Returns:
+            tuple: (claves, totales) ordenados por clave.
+        """
+        claves, indices = np.unique(self.columna(por), return_inverse=True)
+        totales = np.bincount(indices, weights=self._valores(valor), minlength=len(claves))
+        return claves, totales
+
+    def tabla_cruzada(self, filas, columnas, valor='subtotal'):
+        """
+        Suma `valor` en una tabla de `filas` x `columnas`.
+
+        Returns:
+            tuple: (claves_filas, claves_columnas, matriz) donde matriz[i, j]
+                es el total de la fila i y la columna j (0 si no hubo ventas).
+        """
+        claves_f, idx_f = np.unique(self.columna(filas), return_inverse=True)
+        claves_c, idx_c = np.unique(self.columna(columnas), return_inverse=True)
+        matriz = self._sumar_celdas(idx_f, len(claves_f), idx_c, len(claves_c), valor)
+        return claves_f, claves_c, matriz
+
+    def tabla_producto_dia(self, valor='subtotal'):
+        """Tabla cruzada producto x día. Ver `tabla_cruzada()`."""
+        return self.tabla_cruzada('producto_id', 'dia', valor)
+
+    def tabla_hora_dia_semana(self, valor='subtotal'):
+        """
+        Tabla de 24 horas x 7 días de la semana (lunes primero), con todas las
+        celdas aunque no haya ventas en ellas.
+
+        Returns:
+            ndarray: Matriz de 24 x 7.
+        """
+        return self._sumar_celdas(self.hora, 24, self.dia_semana, 7, valor)
+
+    def _sumar_celdas(self, idx_filas, n_filas, idx_columnas, n_columnas, valor):
+        celdas = np.bincount(idx_filas * n_columnas + idx_columnas, weights=self._valores(valor),
+                             minlength=n_filas * n_columnas)
+        return celdas.reshape(n_filas, n_columnas)
+
+    def serie_diaria(self, start_date, end_date, valor='subtotal'):
+        """
+        Total de `valor` por día entre dos fechas (inclusive), con 0 en los
+        días sin ventas, lista para calcular ventanas móviles.
+
+        Returns:
+            tuple: (dias, totales) con dias como ndarray[datetime64[D]].
+        """
+        inicio = np.datetime64(start_date, 'D')
+        dias = np.arange(inicio, np.datetime64(end_date, 'D') + 1)
+        offsets = (self.dia - inicio).astype(np.int64)
+        dentro = (offsets >= 0) & (offsets < len(dias))
+        pesos = self._valores(valor)
+        totales = np.bincount(offsets[dentro], weights=None if pesos is None else pesos[dentro],
+                              minlength=len(dias))
+        return dias, totales.astype(np.float64)
+
+    def simular_precios(self, factores):
+        """
+        Recalcula la facturación con otros precios (análisis "qué pasaría si").
+
+        Args:
+            factores (dict): {producto_id: factor}, por ejemplo {3: 1.10} para un
+                10% de aumento. Los productos que no figuran quedan igual.
+
+        Returns:
+            tuple: (total_real, total_simulado).
+        """
+        multiplicador = np.ones(len(self))
+        for producto_id, factor in factores.items():
+            multiplicador[self.producto_id == producto_id] = factor
+        return float(self.subtotal.sum()), float((self.subtotal * multiplicador).sum())
+
+def media_movil(valores, ventana):
+    """
+    Promedio móvil de `ventana` posiciones (por ejemplo, 7 días sobre una
+    `serie_diaria()`). Las primeras `ventana - 1` posiciones quedan en NaN.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    resultado = np.full(len(valores), np.nan)
+    if ventana <= 0 or ventana > len(valores):
+        return resultado
+    acumulado = np.cumsum(np.concatenate(([0.0], valores)))
+    resultado[ventana - 1:] = (acumulado[ventana:] - acumulado[:-ventana]) / ventana
+    return resultado
+
+class AnalisisController:
+    """
+    Controlador para análisis del historial de ventas en memoria con NumPy.
+
+    A diferencia de ReportesController, que consulta los resúmenes diarios,
+    carga las líneas de venta de un período una sola vez (ver VentasColumnar)
+    y calcula sobre ellas cualquier cantidad de agrupaciones.
+    """
+    def cargar_ventas(self, start_date, end_date, chunk_size=CHUNK_SIZE):
+        """
+        Carga las líneas de venta entre dos fechas (inclusive) en columnas.
+
+        Las filas se leen en tramos de `chunk_size` y se convierten a arreglos
+        tramo por tramo, así la memoria intermedia no crece con el período.
+
+        Returns:
+            VentasColumnar: Las líneas del período, o None si ocurre un error.
+
+        Raises:
+            ImportError: Si NumPy no está instalado.
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("La librería NumPy es necesaria para los análisis. Instálela con 'pip install numpy'.")
+        query = """
+            SELECT v.fecha, v.id, dv.producto_id, v.empleado_id, v.forma_pago, dv.peso, dv.subtotal
+            FROM ventas v
+            JOIN detalle_ventas dv ON dv.venta_id = v.id
+            WHERE v.fecha >= ? AND v.fecha < ?
+            ORDER BY v.fecha
+        """
+        codigos_pago = {forma: codigo for codigo, forma in enumerate(FORMAS_PAGO)}
+        tramos = {nombre: [] for nombre in VentasColumnar.COLUMNAS}
+        conn = get_connection()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, rango_semiabierto(start_date, end_date))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                fecha, venta_id, producto_id, empleado_id, forma_pago, peso, subtotal = zip(*rows)
+                tramos['fecha'].append(np.array(fecha, dtype='datetime64[s]'))
+                tramos['venta_id'].append(np.array(venta_id, dtype=np.int64))
+                tramos['producto_id'].append(np.array(producto_id, dtype=np.int64))
+                tramos['empleado_id'].append(np.array(empleado_id, dtype=np.int64))
+                tramos['forma_pago'].append(np.array([codigos_pago[f] for f in forma_pago], dtype=np.int8))
+                tramos['peso'].append(np.array(peso, dtype=np.float64))
+                tramos['subtotal'].append(np.array(subtotal, dtype=np.float64))
+        except sqlite3.Error as e:
+            print(f"Error al cargar las ventas para el análisis: {e}")
+            return None
+
+        vacios = {'fecha': 'datetime64[s]', 'forma_pago': np.int8, 'peso': np.float64, 'subtotal': np.float64}
+        return VentasColumnar(*(np.concatenate(tramos[nombre]) if tramos[nombre]
+                                else np.array([], dtype=vacios.get(nombre, np.int64))
+                                for nombre in VentasColumnar.COLUMNAS))
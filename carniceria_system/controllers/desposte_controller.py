@@ -1,5 +1,6 @@
 import sqlite3
-from ..utils.db_manager import create_connection
+from ..utils.db_manager import get_connection, transaction
+from ..utils.event_bus import event_bus, MEDIA_RES_REGISTERED, MEDIA_RES_UPDATED, STOCK_CHANGED
 from ..models.media_res import MediaRes
 from .producto_controller import ProductoController
 
@@ -13,24 +14,33 @@ class DesposteController:
     def registrar_media_res(self, peso_inicial, costo, proveedor):
         """Registra una nueva media res en la base de datos."""
         query = "INSERT INTO media_res (peso_inicial, costo, proveedor) VALUES (?, ?, ?)"
-        conn = create_connection()
+        try:
+            with transaction() as cursor:
+                cursor.execute(query, (peso_inicial, costo, proveedor))
+                media_res_id = cursor.lastrowid
+            event_bus.publish(MEDIA_RES_REGISTERED, media_res_id=media_res_id)
+            return media_res_id
+        except sqlite3.Error as e:
+            print(f"Error al registrar media res: {e}")
+        return None
+
+    def obtener_media_res(self, media_res_id):
+        """Devuelve la media res con el ID indicado, o None si no existe."""
+        conn = get_connection()
         if conn:
             try:
-                cursor = conn.cursor()
-                cursor.execute(query, (peso_inicial, costo, proveedor))
-                conn.commit()
-                return cursor.lastrowid
+                row = conn.execute("SELECT * FROM media_res WHERE id = ?", (media_res_id,)).fetchone()
+                if row:
+                    return MediaRes(**row)
             except sqlite3.Error as e:
-                print(f"Error al registrar media res: {e}")
-            finally:
-                conn.close()
+                print(f"Error al obtener la media res: {e}")
         return None
 
     def obtener_medias_res_disponibles(self):
         """Devuelve una lista de medias res que no han sido completamente despostadas."""
         # Consideramos 'disponible' si el peso despostado es menor al inicial.
         query = "SELECT * FROM media_res WHERE peso_despostado < peso_inicial ORDER BY fecha_llegada DESC"
-        conn = create_connection()
+        conn = get_connection()
         disponibles = []
         if conn:
             try:
@@ -40,14 +50,12 @@ class DesposteController:
                     disponibles.append(MediaRes(**row))
             except sqlite3.Error as e:
                 print(f"Error al obtener medias res disponibles: {e}")
-            finally:
-                conn.close()
         return disponibles
 
     def obtener_todas_las_medias_res(self):
         """Devuelve una lista de todas las medias res registradas."""
         query = "SELECT * FROM media_res ORDER BY fecha_llegada DESC"
-        conn = create_connection()
+        conn = get_connection()
         todas = []
         if conn:
             try:
@@ -57,10 +65,51 @@ class DesposteController:
                     todas.append(MediaRes(**row))
             except sqlite3.Error as e:
                 print(f"Error al obtener todas las medias res: {e}")
-            finally:
-                conn.close()
         return todas
 
+    def obtener_medias_res_pagina(self, despues_de=None, limite=100, antes_de=None):
+        """
+        Devuelve una página de medias res, de la más reciente a la más antigua.
+
+        Args:
+            despues_de (tuple, optional): Clave (fecha_llegada, id) de la última
+                media res de la página anterior. None para la primera página.
+            limite (int): Cantidad máxima de registros.
+            antes_de (tuple, optional): Si se indica, devuelve en cambio las
+                medias res inmediatamente anteriores (más recientes) a esta clave.
+
+        Returns:
+            list[MediaRes]: Las medias res de la página, de la más reciente a la más antigua.
+        """
+        conn = get_connection()
+        pagina = []
+        if conn:
+            try:
+                cursor = conn.cursor()
+                if antes_de is not None:
+                    fecha, media_res_id = antes_de
+                    cursor.execute("""
+                        SELECT * FROM media_res
+                        WHERE (fecha_llegada, id) > (?, ?)
+                        ORDER BY fecha_llegada ASC, id ASC
+                        LIMIT ?
+                    """, (str(fecha), media_res_id, limite))
+                    return [MediaRes(**row) for row in reversed(cursor.fetchall())]
+                if despues_de is None:
+                    cursor.execute("SELECT * FROM media_res ORDER BY fecha_llegada DESC, id DESC LIMIT ?", (limite,))
+                else:
+                    fecha, media_res_id = despues_de
+                    cursor.execute("""
+                        SELECT * FROM media_res
+                        WHERE (fecha_llegada, id) < (?, ?)
+                        ORDER BY fecha_llegada DESC, id DESC
+                        LIMIT ?
+                    """, (str(fecha), media_res_id, limite))
+                pagina = [MediaRes(**row) for row in cursor.fetchall()]
+            except sqlite3.Error as e:
+                print(f"Error al obtener las medias res: {e}")
+        return pagina
+
     def realizar_desposte(self, media_res_id, cortes, empleado_id):
         """
         Registra el desposte de una media res, actualizando el stock de los cortes.
@@ -74,44 +123,35 @@ class DesposteController:
         Returns:
             bool: True si la operación fue exitosa, False en caso contrario.
         """
-        conn = create_connection()
-        if not conn:
-            return False
-
         try:
-            cursor = conn.cursor()
-            cursor.execute("BEGIN TRANSACTION")
-
-            total_peso_despostado = 0
-            for corte in cortes:
-                producto_id = corte['producto_id']
-                peso = corte['peso']
-                total_peso_despostado += peso
-
-                # 1. Insertar el registro del desposte
-                query_desposte = "INSERT INTO desposte (media_res_id, producto_id, peso, empleado_id) VALUES (?, ?, ?, ?)"
-                cursor.execute(query_desposte, (media_res_id, producto_id, peso, empleado_id))
-
-                # 2. Actualizar el stock del producto (usando el método del otro controlador, pero dentro de la misma transacción)
-                # Para mantener la atomicidad, realizamos la operación de stock aquí.
-                update_stock_query = "UPDATE productos SET stock_actual = stock_actual + ? WHERE id = ?"
-                cursor.execute(update_stock_query, (peso, producto_id))
-
-            # 3. Actualizar la media res con el peso total despostado y la merma
-            update_media_res_query = """
-                UPDATE media_res
-                SET peso_despostado = peso_despostado + ?,
-                    merma_calculada = peso_inicial - (peso_despostado + ?)
-                WHERE id = ?
-            """
-            cursor.execute(update_media_res_query, (total_peso_despostado, total_peso_despostado, media_res_id))
-
-            conn.commit()
+            with transaction() as cursor:
+                total_peso_despostado = 0
+                for corte in cortes:
+                    producto_id = corte['producto_id']
+                    peso = corte['peso']
+                    total_peso_despostado += peso
+
+                    # 1. Insertar el registro del desposte
+                    query_desposte = "INSERT INTO desposte (media_res_id, producto_id, peso, empleado_id) VALUES (?, ?, ?, ?)"
+                    cursor.execute(query_desposte, (media_res_id, producto_id, peso, empleado_id))
+
+                    # 2. Actualizar el stock del producto dentro de la misma transacción.
+                    update_stock_query = "UPDATE productos SET stock_actual = stock_actual + ? WHERE id = ?"
+                    cursor.execute(update_stock_query, (peso, producto_id))
+
+                # 3. Actualizar la media res con el peso total despostado y la merma
+                update_media_res_query = """
+                    UPDATE media_res
+                    SET peso_despostado = peso_despostado + ?,
+                        merma_calculada = peso_inicial - (peso_despostado + ?)
+                    WHERE id = ?
+                """
+                cursor.execute(update_media_res_query, (total_peso_despostado, total_peso_despostado, media_res_id))
+
+            event_bus.publish(STOCK_CHANGED, producto_ids=[corte['producto_id'] for corte in cortes])
+            event_bus.publish(MEDIA_RES_UPDATED, media_res_id=media_res_id)
             return True
 
         except sqlite3.Error as e:
             print(f"Error al realizar el desposte: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
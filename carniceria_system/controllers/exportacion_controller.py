@@ -0,0 +1,221 @@
+import csv
+import importlib.util
+import os
+import sqlite3
+import sys
+from ..utils.db_manager import get_connection
+from ..utils.fechas import rango_semiabierto
+from .reportes_controller import ReportesController, ReporteCancelado
+
+# --- Dependencia de PyArrow ---
+# El formato columnar (Parquet) es opcional: pip install pyarrow
+# Aquí sólo se comprueba que exista; se importa al exportar.
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Filas que se leen de SQLite y se escriben en cada tramo. La memoria usada
+# depende de este valor y no de la cantidad de filas exportadas.
+EXPORT_CHUNK_SIZE = 5000
+
+FORMATOS = ('csv', 'parquet')
+
+# Tablas exportables fila por fila, filtradas por un rango de fechas
+# semiabierto (ver rango_semiabierto).
+TABLAS = {
+    'ventas': """
+        SELECT v.id, v.numero_ticket, v.fecha, v.turno, u.nombre AS empleado, v.forma_pago, v.total
+        FROM ventas v
+        JOIN usuarios u ON u.id = v.empleado_id
+        WHERE v.fecha >= ? AND v.fecha < ?
+        ORDER BY v.fecha
+    """,
+    'detalle_ventas': """
+        SELECT v.numero_ticket, v.fecha, p.codigo, p.nombre AS producto, dv.peso, dv.precio_unitario, dv.subtotal
+        FROM ventas v
+        JOIN detalle_ventas dv ON dv.venta_id = v.id
+        JOIN productos p ON p.id = dv.producto_id
+        WHERE v.fecha >= ? AND v.fecha < ?
+        ORDER BY v.fecha
+    """,
+    'arqueos': """
+        SELECT a.id, t.fecha, t.turno, u.nombre AS empleado, t.hora_inicio, t.hora_fin,
+               a.efectivo_sistema, a.efectivo_fisico, a.transferencias, a.tarjetas, a.diferencia
+        FROM turnos t
+        JOIN arqueos a ON a.turno_id = t.id
+        JOIN usuarios u ON u.id = t.empleado_id
+        WHERE t.fecha >= ? AND t.fecha < ?
+        ORDER BY t.fecha
+    """,
+}
+
+# Reportes exportables: método de ReportesController y columnas del resultado.
+REPORTES = {
+    'ventas_por_producto': ('get_productos_mas_vendidos', ('nombre', 'total_vendido', 'total_valor', 'puesto_cantidad', 'puesto_valor')),
+    'rendimiento_empleados': ('get_rendimiento_empleados', ('nombre', 'num_ventas', 'total_ventas')),
+    'ventas_por_hora': ('get_ventas_por_hora', ('hora', 'total_ventas')),
+}
+
+# Tipo de cada columna exportada, según su declaración en el esquema. Fija el
+# esquema de los archivos Parquet de antemano, sin depender de los valores
+# del primer tramo (que pueden ser todos NULL). Las columnas que no figuran
+# se exportan como texto.
+TIPOS_COLUMNAS = {
+    'id': 'INTEGER', 'numero_ticket': 'INTEGER', 'num_ventas': 'INTEGER',
+    'puesto_cantidad': 'INTEGER', 'puesto_valor': 'INTEGER',
+    'total': 'REAL', 'peso': 'REAL', 'precio_unitario': 'REAL', 'subtotal': 'REAL',
+    'efectivo_sistema': 'REAL', 'efectivo_fisico': 'REAL', 'transferencias': 'REAL',
+    'tarjetas': 'REAL', 'diferencia': 'REAL',
+    'total_vendido': 'REAL', 'total_valor': 'REAL', 'total_ventas': 'REAL',
+}
+
+class ExportacionController:
+    """
+    Controlador para exportar ventas, arqueos y reportes de un período a archivos.
+
+    Las filas se leen de la base por tramos (fetchmany) y cada tramo se
+    escribe antes de leer el siguiente, así se puede exportar un año de
+    líneas de ticket sin cargarlo en memoria.
+    """
+    def __init__(self):
+        self.reportes_controller = ReportesController()
+
+    def leer_tramos(self, nombre, start_date, end_date, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Abre la consulta de una tabla o reporte del período.
+
+        Args:
+            nombre (str): Clave de TABLAS o de REPORTES.
+            start_date (date or str): Primer día del período.
+            end_date (date or str): Último día del período (inclusive).
+
+        Returns:
+            tuple: (columnas, tramos), donde tramos es un generador de listas
+                de hasta `chunk_size` filas.
+
+        Raises:
+            ValueError: Si el nombre no es una tabla ni un reporte exportable.
+            sqlite3.Error: Si falla la consulta.
+        """
+        if nombre in REPORTES:
+            metodo, columnas = REPORTES[nombre]
+            if metodo == 'get_productos_mas_vendidos':
+                # Todos los productos del período, ordenados por valor
+                filas = self.reportes_controller.get_productos_mas_vendidos(start_date, end_date, limite=sys.maxsize)[1]
+            else:
+                filas = getattr(self.reportes_controller, metodo)(start_date, end_date)
+            # Los reportes están resumidos: se entregan en un único tramo
+            return columnas, iter([filas] if filas else [])
+        if nombre not in TABLAS:
+            raise ValueError(f"No se puede exportar '{nombre}'. Opciones: {', '.join(list(TABLAS) + list(REPORTES))}")
+
+        conn = get_connection()
+        if not conn:
+            raise sqlite3.OperationalError("No hay conexión con la base de datos.")
+        cursor = conn.cursor()
+        cursor.execute(TABLAS[nombre], rango_semiabierto(start_date, end_date))
+        columnas = tuple(descripcion[0] for descripcion in cursor.description)
+        return columnas, self._tramos(cursor, chunk_size)
+
+    def _tramos(self, cursor, chunk_size):
+        try:
+            while True:
+                filas = cursor.fetchmany(chunk_size)
+                if not filas:
+                    return
+                yield filas
+        finally:
+            cursor.close()
+
+    def exportar(self, nombre, start_date, end_date, ruta, formato='csv', chunk_size=EXPORT_CHUNK_SIZE, token=None):
+        """
+        Exporta una tabla o reporte del período a un archivo.
+
+        El archivo se escribe con otro nombre y se renombra al terminar, así
+        una exportación interrumpida no deja un archivo a medias.
+
+        Args:
+            ruta (str): Archivo de destino.
+            formato (str): 'csv' o 'parquet' (requiere PyArrow).
+            token (CancelToken, opcional): Permite cancelar la exportación
+                desde otro hilo; se revisa entre tramos.
+
+        Returns:
+            int: Cantidad de filas exportadas, o None si ocurre un error.
+
+        Raises:
+            ImportError: Si se pide 'parquet' y PyArrow no está instalado.
+            ReporteCancelado: Si se canceló la exportación.
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: '{formato}'. Opciones: {', '.join(FORMATOS)}")
+        if formato == 'parquet' and not PYARROW_AVAILABLE:
+            raise ImportError("La librería PyArrow es necesaria para exportar en Parquet. Instálela con 'pip install pyarrow'.")
+
+        errores = (sqlite3.Error, OSError)
+        if formato == 'parquet':
+            import pyarrow
+            # Por ejemplo, un valor de texto en una columna numérica
+            errores += (pyarrow.ArrowException,)
+
+        tmp_path = ruta + '.tmp'
+        try:
+            columnas, tramos = self.leer_tramos(nombre, start_date, end_date, chunk_size)
+            escribir = self._escribir_csv if formato == 'csv' else self._escribir_parquet
+            total = escribir(tmp_path, columnas, self._cancelables(tramos, token))
+            os.replace(tmp_path, ruta)
+            return total
+        except errores as e:
+            print(f"Error al exportar '{nombre}': {e}")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def exportar_periodo(self, start_date, end_date, carpeta, nombres=None, formato='csv', token=None):
+        """
+        Exporta varias tablas y reportes del período a una carpeta, un archivo
+        por cada uno (por ejemplo `ventas_2024-01-01_2024-12-31.csv`).
+
+        Args:
+            nombres (list, opcional): Tablas y reportes a exportar. Por defecto, todos.
+
+        Returns:
+            dict: {nombre: cantidad de filas o None si falló}.
+        """
+        os.makedirs(carpeta, exist_ok=True)
+        resultados = {}
+        for nombre in nombres or list(TABLAS) + list(REPORTES):
+            archivo = f"{nombre}_{start_date}_{end_date}.{formato}"
+            resultados[nombre] = self.exportar(nombre, start_date, end_date, os.path.join(carpeta, archivo),
+                                               formato, token=token)
+        return resultados
+
+    def _cancelables(self, tramos, token):
+        for filas in tramos:
+            if token and token.cancelled:
+                raise ReporteCancelado()
+            yield filas
+
+    def _escribir_csv(self, ruta, columnas, tramos):
+        total = 0
+        with open(ruta, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columnas)
+            for filas in tramos:
+                writer.writerows(filas)
+                total += len(filas)
+        return total
+
+    def _escribir_parquet(self, ruta, columnas, tramos):
+        """Escribe cada tramo como un grupo de filas del archivo Parquet."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tipos = {'INTEGER': pa.int64(), 'REAL': pa.float64(), 'TEXT': pa.string()}
+        schema = pa.schema([(columna, tipos[TIPOS_COLUMNAS.get(columna, 'TEXT')]) for columna in columnas])
+        total = 0
+        with pq.ParquetWriter(ruta, schema) as writer:
+            for filas in tramos:
+                datos = {columna: [fila[i] for fila in filas] for i, columna in enumerate(columnas)}
+                writer.write_table(pa.table(datos, schema=schema))
+                total += len(filas)
+        return total
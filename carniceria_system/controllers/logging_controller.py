@@ -1,5 +1,227 @@
 import sqlite3
-from ..utils.db_manager import create_connection
+import os
+import json
+import queue
+import threading
+import atexit
+import time
+from datetime import datetime, timezone
+from ..utils.db_manager import DB_FOLDER, connection_manager
+
+# El registro de actividades se escribe en segundo plano: las entradas se
+# agrupan y se insertan en una sola transacción cada LOG_FLUSH_INTERVAL
+# segundos o cada LOG_BATCH_SIZE entradas, lo que ocurra primero.
+LOG_FLUSH_INTERVAL = 0.5
+LOG_BATCH_SIZE = 100
+
+# Si la base está bloqueada (o no disponible) las entradas se agregan a este
+# archivo y se cargan en la tabla de logs en la siguiente escritura exitosa.
+LOG_FALLBACK_PATH = os.path.join(DB_FOLDER, 'logs_pendientes.jsonl')
+
+# Las entradas que la base rechaza (por ejemplo, por una clave foránea
+# inválida) no se reintentan: se apartan en este archivo para revisarlas.
+LOG_QUARANTINE_PATH = os.path.join(DB_FOLDER, 'logs_rechazados.jsonl')
+
+class ActivityLogWriter:
+    """
+    Escritor del registro de actividades en un hilo en segundo plano.
+
+    `write()` sólo encola la entrada, de modo que quien registra la actividad
+    (por ejemplo, la caja al cerrar una venta) nunca espera al log.
+    """
+    def __init__(self, flush_interval=LOG_FLUSH_INTERVAL, batch_size=LOG_BATCH_SIZE,
+                 fallback_path=LOG_FALLBACK_PATH, quarantine_path=LOG_QUARANTINE_PATH):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fallback_path = fallback_path
+        self.quarantine_path = quarantine_path
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="activity-log", daemon=True)
+                self._thread.start()
+
+    def write(self, usuario_id, actividad):
+        """
+        Encola una entrada del registro. La hora se toma en este momento (UTC,
+        como CURRENT_TIMESTAMP), no cuando se escribe el lote.
+        """
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._queue.put((timestamp, usuario_id, actividad))
+        self._ensure_started()
+
+    def flush(self, timeout=None):
+        """
+        Espera a que se escriban todas las entradas encoladas hasta ahora.
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera.
+
+        Returns:
+            bool: True si el lote se escribió (en la base o en el archivo de respaldo).
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Escribe las entradas pendientes y detiene el hilo."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = []
+            waiters = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Acumular hasta completar el lote o hasta que pase el intervalo
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            # Al detenerse o al pedir un flush, vaciar lo que quede en la cola
+            if stop or waiters:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+
+            if batch:
+                self._write_batch(batch)
+            for waiter in waiters:
+                waiter.set()
+
+        connection_manager.close_connection()
+
+    def _write_batch(self, batch):
+        # Las entradas del archivo de respaldo se cargan en su propia
+        # transacción: si fallan, no arrastran al lote nuevo.
+        pending = self._read_fallback()
+        if pending:
+            remaining = self._insert_entries(pending)
+            if len(remaining) < len(pending):
+                self._rewrite_fallback(remaining)
+
+        remaining = self._insert_entries(batch)
+        if remaining:
+            print(f"Advertencia: la base de datos está bloqueada; {len(remaining)} entradas del log "
+                  f"se guardan en {self.fallback_path}.")
+            self._append_fallback(remaining)
+
+    def _insert_entries(self, entries):
+        """
+        Escribe las entradas en la tabla de logs.
+
+        Las entradas que la base rechaza (por ejemplo, un usuario inexistente)
+        se apartan en LOG_QUARANTINE_PATH en lugar de reintentarse.
+
+        Returns:
+            list: Entradas que no se pudieron escribir porque la base estaba
+                bloqueada o no disponible; deben reintentarse más tarde.
+        """
+        query = "INSERT INTO logs (timestamp, usuario_id, actividad) VALUES (?, ?, ?)"
+        try:
+            with connection_manager.transaction() as cursor:
+                cursor.executemany(query, entries)
+            return []
+        except sqlite3.OperationalError:
+            return entries
+        except sqlite3.Error:
+            pass
+
+        # Alguna entrada es inválida: se escriben de a una para apartar sólo esas
+        rejected = []
+        for i, entry in enumerate(entries):
+            try:
+                with connection_manager.transaction() as cursor:
+                    cursor.execute(query, entry)
+            except sqlite3.OperationalError:
+                self._append_fallback(rejected, self.quarantine_path)
+                return entries[i:]
+            except sqlite3.Error as e:
+                print(f"Advertencia: la base de datos rechazó una entrada del log ({e}). "
+                      f"Se aparta en {self.quarantine_path}.")
+                rejected.append(entry)
+        self._append_fallback(rejected, self.quarantine_path)
+        return []
+
+    def _read_fallback(self):
+        """Devuelve las entradas guardadas en el archivo de respaldo, si existe."""
+        if not os.path.exists(self.fallback_path):
+            return []
+        entries = []
+        try:
+            with open(self.fallback_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries.append((entry['timestamp'], entry['usuario_id'], entry['actividad']))
+        except (OSError, ValueError) as e:
+            print(f"ERROR CRÍTICO: No se pudo leer el archivo de logs pendientes. Error: {e}")
+            return []
+        return entries
+
+    def _rewrite_fallback(self, entries):
+        """Reemplaza el archivo de respaldo por las entradas que siguen pendientes."""
+        if not entries:
+            os.remove(self.fallback_path)
+            return
+        tmp_path = self.fallback_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self._append_fallback(entries, tmp_path)
+        os.replace(tmp_path, self.fallback_path)
+
+    def _append_fallback(self, batch, path=None):
+        if not batch:
+            return
+        try:
+            with open(path or self.fallback_path, 'a', encoding='utf-8') as f:
+                for timestamp, usuario_id, actividad in batch:
+                    f.write(json.dumps({'timestamp': timestamp, 'usuario_id': usuario_id,
+                                        'actividad': actividad}, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"ERROR CRÍTICO: No se pudo registrar el log. Error: {e}")
+            for _, usuario_id, actividad in batch:
+                print(f"Log no registrado: Usuario ID {usuario_id}, Actividad: {actividad}")
+
+# Instancia compartida por todo el proceso. Al salir se escriben las entradas
+# pendientes (se registra después de connection_manager, por lo que corre antes).
+activity_log_writer = ActivityLogWriter()
+atexit.register(activity_log_writer.close)
 
 class LoggingController:
     """
@@ -8,23 +230,14 @@ class LoggingController:
     def log_activity(self, usuario_id, actividad):
         """
         Registra una nueva actividad en la tabla de logs.
+        La escritura se hace en segundo plano (ver ActivityLogWriter).
 
         Args:
             usuario_id (int): El ID del usuario que realiza la acción. Puede ser None si es una acción del sistema.
             actividad (str): Una descripción de la actividad realizada.
         """
-        query = "INSERT INTO logs (usuario_id, actividad) VALUES (?, ?)"
+        activity_log_writer.write(usuario_id, actividad)
 
-        conn = create_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute(query, (usuario_id, actividad))
-                conn.commit()
-            except sqlite3.Error as e:
-                # En un sistema real, si el logging falla, debería registrarse
-                # en un archivo de texto como último recurso.
-                print(f"ERROR CRÍTICO: No se pudo registrar el log en la base de datos. Error: {e}")
-                print(f"Log no registrado: Usuario ID {usuario_id}, Actividad: {actividad}")
-            finally:
-                conn.close()
+    def flush(self, timeout=None):
+        """Espera a que el registro de actividades pendiente quede escrito."""
+        return activity_log_writer.flush(timeout)
@@ -1,6 +1,140 @@
 import sqlite3
+import threading
+import unicodedata
+import difflib
+import heapq
+import re
 from ..models.producto import Producto
-from ..utils.db_manager import create_connection
+from ..utils.db_manager import get_connection, transaction
+from ..utils.barcode import decode_scale_barcode
+from ..utils.event_bus import event_bus, STOCK_CHANGED
+
+def normalizar_texto(texto):
+    """Pasa el texto a minúsculas y le quita los acentos ('Vacío' -> 'vacio')."""
+    texto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+# Cantidad de nombres que se comparan letra por letra en la búsqueda
+# aproximada: los que más trigramas comparten con el texto buscado.
+CANDIDATOS_DIFUSOS = 50
+
+def trigramas(texto):
+    """Devuelve los trigramas de un texto ya normalizado ('vacio' -> {' va', 'vac', ...})."""
+    texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+class IndiceNombres:
+    """
+    Índice de trigramas sobre los nombres normalizados del catálogo.
+
+    Resuelve las búsquedas por parte del nombre y las aproximadas mirando
+    sólo los productos que comparten trigramas con el texto buscado, en vez
+    de recorrer el catálogo completo.
+    """
+    def __init__(self, nombres):
+        """
+        Args:
+            nombres (dict): {producto_id: nombre}.
+        """
+        self.normalizados = {producto_id: normalizar_texto(nombre) for producto_id, nombre in nombres.items()}
+        self._por_trigrama = {}
+        for producto_id, nombre in self.normalizados.items():
+            for trigrama in trigramas(nombre):
+                self._por_trigrama.setdefault(trigrama, set()).add(producto_id)
+
+    def contienen(self, texto):
+        """IDs de los productos cuyo nombre contiene `texto` (de 3 letras o más)."""
+        if len(texto) < 3:
+            return []
+        # Los trigramas internos del texto deben estar todos en el nombre
+        internos = {texto[i:i + 3] for i in range(len(texto) - 2)}
+        listas = sorted((self._por_trigrama.get(t, set()) for t in internos), key=len)
+        ids = set(listas[0]).intersection(*listas[1:])
+        return [producto_id for producto_id in ids if texto in self.normalizados[producto_id]]
+
+    def parecidos(self, texto, umbral=0.6, candidatos=CANDIDATOS_DIFUSOS):
+        """
+        IDs de los productos con nombre parecido a `texto` (errores de tipeo),
+        del más al menos parecido.
+        """
+        comunes = {}
+        for trigrama in trigramas(texto):
+            for producto_id in self._por_trigrama.get(trigrama, ()):
+                comunes[producto_id] = comunes.get(producto_id, 0) + 1
+        mejores = heapq.nlargest(candidatos, comunes, key=comunes.get)
+        puntajes = [(difflib.SequenceMatcher(None, texto, self.normalizados[producto_id]).ratio(), producto_id)
+                    for producto_id in mejores]
+        puntajes.sort(key=lambda par: par[0], reverse=True)
+        return [producto_id for ratio, producto_id in puntajes if ratio >= umbral]
+
+class CatalogoCache:
+    """
+    Copia en memoria del catálogo de productos, compartida por todo el proceso.
+
+    Se indexa por ID y por código para que las búsquedas en la caja no vayan
+    a SQLite. Antes de cada uso se valida con la secuencia 'catalogo', que los
+    triggers de 'productos' incrementan con cada cambio en esa tabla, venga de
+    esta conexión, de otro hilo o de otra terminal (ver CATALOG_TRIGGERS).
+    Si cambió, el catálogo se vuelve a leer completo; las escrituras en otras
+    tablas (logs, detalle de ventas) no lo invalidan.
+    Los objetos Producto devueltos son compartidos: no deben modificarse.
+
+    El índice de nombres para la búsqueda (IndiceNombres) se arma al primer
+    uso y se conserva mientras no cambie ningún nombre, de modo que una venta
+    (que sólo cambia el stock) no obliga a reconstruirlo.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._por_id = {}
+        self._por_codigo = {}
+        self._por_nombre = []
+        self._nombres = {}
+        self._indice_nombres = None
+
+    def _obtener(self, conn):
+        """Devuelve los índices vigentes, recargándolos si la base cambió."""
+        row = conn.execute("SELECT valor FROM secuencias WHERE nombre = 'catalogo'").fetchone()
+        version = row[0] if row else None
+        with self._lock:
+            if version is None or version != self._version:
+                rows = conn.execute("SELECT * FROM productos ORDER BY id").fetchall()
+                productos = [Producto(**row) for row in rows]
+                self._por_id = {p.id: p for p in productos}
+                self._por_codigo = {p.codigo: p for p in productos if p.codigo is not None}
+                self._por_nombre = sorted(productos, key=lambda p: p.nombre)
+                nombres = {p.id: p.nombre for p in productos}
+                if nombres != self._nombres:
+                    self._nombres = nombres
+                    self._indice_nombres = None
+                # Dentro de una transacción se ven cambios que todavía pueden
+                # revertirse: se usan, pero no se dan por válidos después.
+                self._version = None if conn.in_transaction else version
+            return self._por_id, self._por_codigo, self._por_nombre
+
+    def por_id(self, conn, producto_id):
+        return self._obtener(conn)[0].get(producto_id)
+
+    def por_codigo(self, conn, codigo):
+        return self._obtener(conn)[1].get(codigo)
+
+    def todos(self, conn):
+        """Todos los productos, en el orden de `ORDER BY id`."""
+        return list(self._obtener(conn)[0].values())
+
+    def ordenados_por_nombre(self, conn):
+        return list(self._obtener(conn)[2])
+
+    def indice_nombres(self, conn):
+        """Devuelve el IndiceNombres del catálogo vigente."""
+        self._obtener(conn)
+        with self._lock:
+            if self._indice_nombres is None:
+                self._indice_nombres = IndiceNombres(self._nombres)
+            return self._indice_nombres
+
+# Instancia compartida por todos los controladores del proceso.
+catalogo_cache = CatalogoCache()
 
 class ProductoController:
     """
@@ -15,77 +149,204 @@ class ProductoController:
         INSERT INTO productos (nombre, codigo, precio_kg, stock_actual, stock_minimo, fecha_ingreso, dias_frescura)
         VALUES (?, ?, ?, 0.0, ?, date('now'), ?)
         """
-        conn = create_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
+        try:
+            with transaction() as cursor:
                 cursor.execute(query, (nombre, codigo, precio_kg, stock_minimo, dias_frescura))
-                conn.commit()
-                return cursor.lastrowid
-            except sqlite3.IntegrityError:
-                print(f"Error: El producto con nombre '{nombre}' o código '{codigo}' ya existe.")
-                return None
-            except sqlite3.Error as e:
-                print(f"Error al crear producto: {e}")
-                return None
-            finally:
-                conn.close()
-        return None
+                producto_id = cursor.lastrowid
+            event_bus.publish(STOCK_CHANGED, producto_ids=[producto_id])
+            return producto_id
+        except sqlite3.IntegrityError:
+            print(f"Error: El producto con nombre '{nombre}' o código '{codigo}' ya existe.")
+            return None
+        except sqlite3.Error as e:
+            print(f"Error al crear producto: {e}")
+            return None
 
     def buscar_producto(self, termino):
         """
         Busca un producto por su código o por su nombre.
-        Prioriza la búsqueda por código.
+        Prioriza la búsqueda por código exacto; por nombre devuelve el resultado
+        más relevante de `buscar_productos()`.
         """
-        conn = create_connection()
+        conn = get_connection()
         if not conn:
             return None
 
         try:
-            cursor = conn.cursor()
-
             # 1. Intentar buscar por código exacto
-            query_codigo = "SELECT * FROM productos WHERE codigo = ?"
-            cursor.execute(query_codigo, (termino,))
-            data = cursor.fetchone()
-            if data:
-                return Producto(**data)
-
-            # 2. Si no se encuentra, buscar por nombre (coincidencia parcial, insensible a mayúsculas)
-            query_nombre = "SELECT * FROM productos WHERE nombre LIKE ? COLLATE NOCASE"
-            cursor.execute(query_nombre, (f'%{termino}%',))
-            data = cursor.fetchone()
-            if data:
-                return Producto(**data)
+            producto = catalogo_cache.por_codigo(conn, termino)
+            if producto:
+                return producto
+
+            # 2. Si no se encuentra, tomar la mejor coincidencia por nombre
+            coincidencias = self.buscar_productos(termino, limite=1, difuso=False)
+            if coincidencias:
+                return coincidencias[0]
 
         except sqlite3.Error as e:
             print(f"Error al buscar producto: {e}")
-        finally:
-            if conn:
-                conn.close()
 
         return None
 
+    def buscar_productos(self, termino, limite=10, difuso=True):
+        """
+        Busca productos por nombre o código y devuelve los mejores resultados.
+
+        Primero usa el índice de texto completo (cada palabra como prefijo,
+        ordenado por relevancia); si faltan resultados, completa con los
+        nombres que contienen el texto y, si `difuso` es True, con los
+        nombres parecidos (errores de tipeo). No distingue mayúsculas ni acentos.
+
+        Args:
+            termino (str): Texto a buscar.
+            limite (int): Cantidad máxima de resultados.
+            difuso (bool): Si se incluyen coincidencias aproximadas.
+
+        Returns:
+            list[Producto]: Los productos encontrados, del más al menos relevante.
+        """
+        palabras = re.findall(r'\w+', normalizar_texto(termino))
+        conn = get_connection()
+        if not palabras or not conn:
+            return []
+
+        resultados = []
+        try:
+            try:
+                consulta = ' '.join(f'"{palabra}"*' for palabra in palabras)
+                cursor = conn.execute(
+                    "SELECT rowid FROM productos_fts WHERE productos_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (consulta, limite))
+                resultados = [catalogo_cache.por_id(conn, row[0]) for row in cursor.fetchall()]
+                resultados = [p for p in resultados if p is not None]
+            except sqlite3.OperationalError:
+                pass # Sin índice de texto completo: sólo la búsqueda en memoria
+
+            if len(resultados) < limite:
+                buscado = ' '.join(palabras)
+                indice = catalogo_cache.indice_nombres(conn)
+                candidatos = sorted(indice.contienen(buscado), key=lambda i: indice.normalizados[i])
+                if difuso:
+                    candidatos += indice.parecidos(buscado)
+                vistos = {p.id for p in resultados}
+                for producto_id in candidatos:
+                    if len(resultados) >= limite:
+                        break
+                    producto = catalogo_cache.por_id(conn, producto_id)
+                    if producto and producto.id not in vistos:
+                        resultados.append(producto)
+                        vistos.add(producto.id)
+        except sqlite3.Error as e:
+            print(f"Error al buscar productos: {e}")
+
+        return resultados
+
+    def buscar_producto_por_codigo(self, codigo):
+        """
+        Devuelve el producto con el código exacto indicado, sin buscar por nombre.
+        """
+        conn = get_connection()
+        if not conn:
+            return None
+        try:
+            return catalogo_cache.por_codigo(conn, codigo)
+        except sqlite3.Error as e:
+            print(f"Error al buscar producto: {e}")
+            return None
+
+    def buscar_por_etiqueta_balanza(self, codigo_barras):
+        """
+        Resuelve una etiqueta de balanza (EAN-13 con peso o importe) al producto y su peso.
+
+        El código de producto de la etiqueta se busca tal cual y, si no existe,
+        sin los ceros a la izquierda (ej. '00123' -> '123').
+
+        Args:
+            codigo_barras (str): El código leído por el escáner.
+
+        Returns:
+            tuple: (Producto, peso en kg), o None si no es una etiqueta de balanza.
+
+        Raises:
+            ValueError: Si la etiqueta tiene un dígito verificador inválido,
+                        su código no corresponde a ningún producto o es una
+                        etiqueta de importe de un producto sin precio por kg.
+        """
+        etiqueta = decode_scale_barcode(codigo_barras)
+        if not etiqueta:
+            return None
+
+        producto = (self.buscar_producto_por_codigo(etiqueta['codigo'])
+                    or self.buscar_producto_por_codigo(etiqueta['codigo'].lstrip('0')))
+        if not producto:
+            raise ValueError(f"No existe un producto con el código de balanza '{etiqueta['codigo']}'.")
+
+        if 'peso' in etiqueta:
+            peso = etiqueta['peso']
+        elif producto.precio_kg <= 0:
+            raise ValueError(f"El producto '{producto.nombre}' no tiene precio por kg: "
+                             f"no se puede calcular el peso de la etiqueta.")
+        else:
+            peso = round(etiqueta['precio'] / producto.precio_kg, 3)
+        return producto, peso
+
+    def obtener_producto_por_id(self, producto_id):
+        """
+        Devuelve el producto con el ID indicado, o None si no existe.
+        """
+        conn = get_connection()
+        if not conn:
+            return None
+        try:
+            return catalogo_cache.por_id(conn, producto_id)
+        except sqlite3.Error as e:
+            print(f"Error al buscar producto: {e}")
+            return None
+
     def obtener_todos_los_productos(self):
         """
-        Devuelve una lista de todos los productos.
+        Devuelve una lista de todos los productos, ordenada por nombre.
         """
-        query = "SELECT * FROM productos ORDER BY nombre"
         productos = []
-        conn = create_connection()
+        conn = get_connection()
         if conn:
             try:
-                cursor = conn.cursor()
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                for row in rows:
-                    productos.append(Producto(**row))
+                productos = catalogo_cache.ordenados_por_nombre(conn)
             except sqlite3.Error as e:
                 print(f"Error al obtener todos los productos: {e}")
-            finally:
-                conn.close()
         return productos
 
+    def obtener_productos_pagina(self, despues_de=None, limite=100, antes_de=None):
+        """
+        Devuelve una página de productos ordenados por nombre.
+
+        Args:
+            despues_de (str, optional): Nombre del último producto de la página
+                anterior. None para la primera página.
+            limite (int): Cantidad máxima de productos.
+            antes_de (str, optional): Si se indica, devuelve en cambio los
+                productos inmediatamente anteriores a este nombre (para volver
+                a cargar una página descartada).
+
+        Returns:
+            list[Producto]: Los productos de la página, ordenados por nombre.
+        """
+        conn = get_connection()
+        pagina = []
+        if conn:
+            try:
+                cursor = conn.cursor()
+                if antes_de is not None:
+                    cursor.execute("SELECT * FROM productos WHERE nombre < ? ORDER BY nombre DESC LIMIT ?",
+                                   (antes_de, limite))
+                    return [Producto(**row) for row in reversed(cursor.fetchall())]
+                cursor.execute("SELECT * FROM productos WHERE nombre > ? ORDER BY nombre LIMIT ?",
+                               (despues_de if despues_de is not None else '', limite))
+                pagina = [Producto(**row) for row in cursor.fetchall()]
+            except sqlite3.Error as e:
+                print(f"Error al obtener los productos: {e}")
+        return pagina
+
     def actualizar_stock(self, producto_id, cantidad_kg, operacion='restar'):
         """
         Actualiza el stock de un producto. La operación puede ser 'sumar' o 'restar'.
@@ -94,11 +355,8 @@ class ProductoController:
             raise ValueError("La operación debe ser 'sumar' or 'restar'")
 
         # Usamos una sola transacción para leer y actualizar, evitando race conditions.
-        conn = create_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-
+        try:
+            with transaction() as cursor:
                 # Obtenemos el stock actual de forma segura
                 cursor.execute("SELECT stock_actual FROM productos WHERE id = ?", (producto_id,))
                 result = cursor.fetchone()
@@ -119,33 +377,25 @@ class ProductoController:
                 # Actualizamos el stock
                 update_query = "UPDATE productos SET stock_actual = ? WHERE id = ?"
                 cursor.execute(update_query, (nuevo_stock, producto_id))
-                conn.commit()
-                return True
 
-            except sqlite3.Error as e:
-                print(f"Error al actualizar stock: {e}")
-                conn.rollback() # Revertir cambios en caso de error
-                return False
-            finally:
-                conn.close()
-        return False
+            event_bus.publish(STOCK_CHANGED, producto_ids=[producto_id])
+            return True
+
+        except sqlite3.Error as e:
+            # La transacción ya fue revertida por el gestor de conexiones.
+            print(f"Error al actualizar stock: {e}")
+            return False
 
     def obtener_productos_con_stock_bajo(self):
         """
         Devuelve productos cuyo stock actual es menor o igual al stock mínimo.
         """
-        query = "SELECT * FROM productos WHERE stock_actual <= stock_minimo AND stock_actual > 0"
         productos = []
-        conn = create_connection()
+        conn = get_connection()
         if conn:
             try:
-                cursor = conn.cursor()
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                for row in rows:
-                    productos.append(Producto(**row))
+                productos = [p for p in catalogo_cache.todos(conn)
+                             if 0 < p.stock_actual <= p.stock_minimo]
             except sqlite3.Error as e:
                 print(f"Error al obtener productos con stock bajo: {e}")
-            finally:
-                conn.close()
         return productos
@@ -1,92 +1,310 @@
 import sqlite3
-from ..utils.db_manager import create_connection
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from ..utils.db_manager import get_connection, transaction
+from ..utils.event_bus import event_bus, VENTA_CREATED
+from ..utils.fechas import rango_semiabierto
+from ..database.schema import rebuild_rollups
+
+# Cada cuántas instrucciones de la máquina virtual de SQLite se revisa si el
+# reporte fue cancelado o se quedó sin tiempo.
+PROGRESS_INTERVAL = 1000
+
+# Tiempo máximo, en segundos, que puede tardar cada consulta de un reporte.
+QUERY_TIME_BUDGET = 10.0
+
+# Intervalo mínimo, en segundos, entre dos avisos de progreso.
+PROGRESS_REPORT_INTERVAL = 0.1
+
+# Cantidad máxima de resultados de reportes guardados en memoria.
+REPORT_CACHE_SIZE = 128
+
+# Segundos que se reutiliza el resultado de un rango que incluye el día de
+# hoy. Las ventas de este proceso lo invalidan al instante; el vencimiento
+# cubre las ventas registradas desde otras terminales.
+LIVE_RANGE_TTL = 60.0
+
+class ReporteCancelado(Exception):
+    """
+    La consulta de un reporte se interrumpió antes de terminar.
+
+    Attributes:
+        tiempo_agotado (bool): True si se superó el tiempo máximo, False si se canceló.
+    """
+    def __init__(self, tiempo_agotado=False):
+        self.tiempo_agotado = tiempo_agotado
+        super().__init__("El reporte superó el tiempo máximo." if tiempo_agotado else "El reporte fue cancelado.")
+
+class CancelToken:
+    """
+    Permite cancelar desde otro hilo las consultas de un reporte en curso.
+
+    Las consultas de ReportesController revisan el token periódicamente
+    (con el progress handler de SQLite) y se interrumpen en cuanto se pide
+    la cancelación o vence el tiempo máximo de la consulta.
+
+    Args:
+        time_budget (float): Segundos máximos por consulta.
+        on_progress (callable, optional): Se llama, desde el hilo que ejecuta
+            la consulta, con la cantidad de pasos de SQLite realizados.
+    """
+    def __init__(self, time_budget=QUERY_TIME_BUDGET, on_progress=None):
+        self.time_budget = time_budget
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+class ReportCache:
+    """
+    Caché LRU de resultados de reportes, indexada por consulta y parámetros.
+
+    Un rango de fechas que terminó antes de hoy ya no puede cambiar (salvo al
+    reconstruir los resúmenes, que vacía la caché), así que su resultado se
+    guarda sin vencimiento. Los rangos que incluyen el día de hoy se invalidan
+    cuando se registra una venta y vencen a los LIVE_RANGE_TTL segundos.
+    """
+    def __init__(self, max_entries=REPORT_CACHE_SIZE, live_ttl=LIVE_RANGE_TTL):
+        self.max_entries = max_entries
+        self.live_ttl = live_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        """Cambia cada vez que se invalidan los rangos de hoy."""
+        return self._generation
+
+    def get(self, key):
+        """Devuelve las filas guardadas para `key`, o None si no están (o vencieron)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[0])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, rows, live, generation=None):
+        """
+        Guarda un resultado.
+
+        Args:
+            live (bool): True si el rango incluye el día de hoy.
+            generation (int, optional): `generation` leída antes de ejecutar la
+                consulta. Si entretanto se invalidaron los rangos de hoy, el
+                resultado puede estar desactualizado y no se guarda.
+        """
+        with self._lock:
+            if live and generation is not None and generation != self._generation:
+                return
+            expires = time.monotonic() + self.live_ttl if live else None
+            self._entries[key] = (list(rows), expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_live(self):
+        """Descarta los resultados de rangos que incluyen el día de hoy."""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key, (_, expires) in self._entries.items() if expires is not None]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Devuelve los contadores de la caché: aciertos, fallos y entradas guardadas."""
+        with self._lock:
+            return {'aciertos': self.hits, 'fallos': self.misses, 'entradas': len(self._entries)}
+
+# Instancia compartida por todos los controladores del proceso.
+report_cache = ReportCache()
+event_bus.subscribe(VENTA_CREATED, lambda **venta: report_cache.invalidate_live())
 
 class ReportesController:
     """
     Controlador para generar datos para estadísticas y reportes.
+
+    Los reportes leen las tablas de resumen diario (resumen_ventas_*), que
+    VentaController mantiene al registrar cada venta.
     """
 
-    def _execute_query(self, query, params=()):
-        """Ejecuta una consulta y devuelve todos los resultados."""
-        conn = create_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                return cursor.fetchall()
-            except sqlite3.Error as e:
-                print(f"Error al ejecutar consulta de reporte: {e}")
-                return []
-            finally:
-                conn.close()
-        return []
-
-    def get_productos_mas_vendidos(self, start_date, end_date):
+    def _execute_query(self, query, params=(), token=None):
+        """
+        Ejecuta una consulta y devuelve todos los resultados.
+
+        Los resultados se guardan en `report_cache`. Las fechas de `params`
+        (cadenas ISO, ver `rango_semiabierto()`) deciden si todavía pueden cambiar:
+        si alguna es posterior a hoy, el rango incluye el día en curso.
+
+        La consulta se interrumpe si `token` se cancela o si tarda más que su
+        tiempo máximo (QUERY_TIME_BUDGET si no se indica un token).
+
+        Raises:
+            ReporteCancelado: Si la consulta se interrumpió.
+        """
+        key = (query, tuple(params))
+        rows = report_cache.get(key)
+        if rows is not None:
+            return rows
+        today = date.today().isoformat()
+        live = not params or any(isinstance(param, str) and param > today for param in params)
+        generation = report_cache.generation
+
+        conn = get_connection()
+        if not conn:
+            return []
+
+        token = token or CancelToken()
+        if token.cancelled:
+            raise ReporteCancelado()
+        deadline = time.monotonic() + token.time_budget
+        estado = {'pasos': 0, 'aviso': 0.0, 'tiempo_agotado': False}
+
+        def _progress():
+            if token.cancelled:
+                return 1
+            now = time.monotonic()
+            if now > deadline:
+                estado['tiempo_agotado'] = True
+                return 1
+            estado['pasos'] += PROGRESS_INTERVAL
+            if token.on_progress and now - estado['aviso'] >= PROGRESS_REPORT_INTERVAL:
+                estado['aviso'] = now
+                token.on_progress(estado['pasos'])
+            return 0
+
+        conn.set_progress_handler(_progress, PROGRESS_INTERVAL)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            if token.cancelled or estado['tiempo_agotado']:
+                raise ReporteCancelado(estado['tiempo_agotado']) from e
+            print(f"Error al ejecutar consulta de reporte: {e}")
+            return []
+        except sqlite3.Error as e:
+            print(f"Error al ejecutar consulta de reporte: {e}")
+            return []
+        finally:
+            conn.set_progress_handler(None, 0)
+        report_cache.put(key, rows, live, generation)
+        return rows
+
+    def get_productos_mas_vendidos(self, start_date, end_date, token=None, limite=10):
         """
         Devuelve los productos más vendidos por cantidad (kg) y valor monetario.
 
+        Ambos rankings salen de una sola consulta: el período se agrega una
+        vez por producto y las funciones de ventana numeran el resultado por
+        cada criterio.
+
+        Todos los reportes aceptan un `token` (CancelToken) para cancelarlos
+        desde otro hilo; si se cancela o vence su tiempo lanzan ReporteCancelado.
+
+        Args:
+            limite (int): Cantidad de productos de cada ranking.
+
         Returns:
-            (list, list): Tupla con dos listas: (por_cantidad, por_valor)
-        """
-        # Por cantidad (peso total vendido)
-        query_cantidad = """
-            SELECT p.nombre, SUM(dv.peso) as total_vendido
-            FROM detalle_ventas dv
-            JOIN productos p ON dv.producto_id = p.id
-            JOIN ventas v ON dv.venta_id = v.id
-            WHERE DATE(v.fecha) BETWEEN ? AND ?
-            GROUP BY p.nombre
-            ORDER BY total_vendido DESC
-            LIMIT 10;
-        """
-        # Por valor (suma de subtotales)
-        query_valor = """
-            SELECT p.nombre, SUM(dv.subtotal) as total_valor
-            FROM detalle_ventas dv
-            JOIN productos p ON dv.producto_id = p.id
-            JOIN ventas v ON dv.venta_id = v.id
-            WHERE DATE(v.fecha) BETWEEN ? AND ?
-            GROUP BY p.nombre
-            ORDER BY total_valor DESC
-            LIMIT 10;
-        """
-        params = (start_date, end_date)
-        return (self._execute_query(query_cantidad, params),
-                self._execute_query(query_valor, params))
-
-    def get_rendimiento_empleados(self, start_date, end_date):
+            (list, list): Tupla con dos listas: (por_cantidad, por_valor).
+                Cada fila tiene nombre, total_vendido y total_valor.
+        """
+        query = """
+            WITH totales AS (
+                SELECT producto_id, SUM(peso_total) AS total_vendido, SUM(subtotal_total) AS total_valor
+                FROM resumen_ventas_producto
+                WHERE dia >= ? AND dia < ?
+                GROUP BY producto_id
+            ), ranking AS (
+                SELECT producto_id, total_vendido, total_valor,
+                       ROW_NUMBER() OVER (ORDER BY total_vendido DESC, producto_id) AS puesto_cantidad,
+                       ROW_NUMBER() OVER (ORDER BY total_valor DESC, producto_id) AS puesto_valor
+                FROM totales
+            )
+            SELECT p.nombre, r.total_vendido, r.total_valor, r.puesto_cantidad, r.puesto_valor
+            FROM ranking r
+            JOIN productos p ON r.producto_id = p.id
+            WHERE r.puesto_cantidad <= ? OR r.puesto_valor <= ?;
+        """
+        params = rango_semiabierto(start_date, end_date) + (limite, limite)
+        return self._split_rankings(self._execute_query(query, params, token), limite)
+
+    def _split_rankings(self, rows, limite):
+        """Separa las filas numeradas en los rankings por cantidad y por valor."""
+        por_cantidad = sorted((row for row in rows if row['puesto_cantidad'] <= limite),
+                              key=lambda row: row['puesto_cantidad'])
+        por_valor = sorted((row for row in rows if row['puesto_valor'] <= limite),
+                           key=lambda row: row['puesto_valor'])
+        return por_cantidad, por_valor
+
+    def get_rendimiento_empleados(self, start_date, end_date, token=None):
         """
         Devuelve el rendimiento de los empleados por total de ventas.
         """
         query = """
-            SELECT u.nombre, COUNT(v.id) as num_ventas, SUM(v.total) as total_ventas
-            FROM ventas v
-            JOIN usuarios u ON v.empleado_id = u.id
-            WHERE DATE(v.fecha) BETWEEN ? AND ?
+            SELECT u.nombre, SUM(r.num_ventas) as num_ventas, SUM(r.total_ventas) as total_ventas
+            FROM resumen_ventas_empleado r
+            JOIN usuarios u ON r.empleado_id = u.id
+            WHERE r.dia >= ? AND r.dia < ?
             GROUP BY u.nombre
             ORDER BY total_ventas DESC;
         """
-        return self._execute_query(query, (start_date, end_date))
+        return self._execute_query(query, rango_semiabierto(start_date, end_date), token)
 
-    def get_ventas_por_hora(self, start_date, end_date):
+    def get_ventas_por_hora(self, start_date, end_date, token=None):
         """
         Devuelve el total de ventas agrupado por hora del día para identificar horas pico.
         """
         query = """
-            SELECT STRFTIME('%H', fecha) as hora, SUM(total) as total_ventas
-            FROM ventas
-            WHERE DATE(fecha) BETWEEN ? AND ?
+            SELECT hora, SUM(total_ventas) as total_ventas
+            FROM resumen_ventas_hora
+            WHERE dia >= ? AND dia < ?
             GROUP BY hora
             ORDER BY hora ASC;
         """
-        return self._execute_query(query, (start_date, end_date))
+        return self._execute_query(query, rango_semiabierto(start_date, end_date), token)
 
-    def get_ganancias_totales(self, start_date, end_date):
+    def get_ganancias_totales(self, start_date, end_date, token=None):
         """
         Calcula las ganancias totales en un período.
         NOTA: Este es un cálculo simplificado. Un cálculo real necesitaría
         conocer el costo de los productos. Por ahora, es igual a las ventas totales.
         """
-        query = "SELECT SUM(total) FROM ventas WHERE DATE(fecha) BETWEEN ? AND ?;"
-        result = self._execute_query(query, (start_date, end_date))
+        query = "SELECT SUM(total_ventas) FROM resumen_ventas_empleado WHERE dia >= ? AND dia < ?;"
+        result = self._execute_query(query, rango_semiabierto(start_date, end_date), token)
         return result[0][0] if result and result[0][0] is not None else 0
+
+    def reconstruir_resumenes(self):
+        """
+        Recalcula las tablas de resumen desde ventas y detalle_ventas.
+        Útil tras correcciones manuales de datos o una restauración de backup.
+
+        Returns:
+            bool: True si la operación fue exitosa, False en caso contrario.
+        """
+        try:
+            with transaction() as cursor:
+                rebuild_rollups(cursor)
+            report_cache.clear()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al reconstruir los resúmenes de ventas: {e}")
+            return False
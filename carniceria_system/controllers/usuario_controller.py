@@ -1,6 +1,6 @@
 import sqlite3
 from ..models.usuario import Usuario
-from ..utils.db_manager import create_connection
+from ..utils.db_manager import get_connection, transaction
 from ..utils.security import hash_password
 from .logging_controller import LoggingController
 
@@ -26,7 +26,7 @@ class UsuarioController:
 
         query = "SELECT * FROM usuarios WHERE nombre = ? AND password_hash = ? AND activo = 1"
 
-        conn = create_connection()
+        conn = get_connection()
         if conn is not None:
             try:
                 cursor = conn.cursor()
@@ -37,8 +37,6 @@ class UsuarioController:
                     return Usuario(id=user_data['id'], nombre=user_data['nombre'], nivel=user_data['nivel'])
             except sqlite3.Error as e:
                 print(f"Error al verificar credenciales: {e}")
-            finally:
-                conn.close()
 
         return None
 
@@ -58,27 +56,21 @@ class UsuarioController:
         password_hash = hash_password(password)
         query = "INSERT INTO usuarios (nombre, password_hash, nivel) VALUES (?, ?, ?)"
 
-        conn = create_connection()
-        if conn is not None:
-            try:
-                cursor = conn.cursor()
+        try:
+            with transaction() as cursor:
                 cursor.execute(query, (nombre, password_hash, nivel))
                 nuevo_usuario_id = cursor.lastrowid
-                conn.commit()
 
-                log_msg = f"Creación de usuario - Nuevo usuario: '{nombre}' (ID: {nuevo_usuario_id}), Nivel: {nivel}"
-                self.logging_controller.log_activity(creador_id, log_msg)
+            log_msg = f"Creación de usuario - Nuevo usuario: '{nombre}' (ID: {nuevo_usuario_id}), Nivel: {nivel}"
+            self.logging_controller.log_activity(creador_id, log_msg)
 
-                return nuevo_usuario_id
-            except sqlite3.IntegrityError:
-                print(f"Error: El usuario '{nombre}' ya existe.")
-                return None
-            except sqlite3.Error as e:
-                print(f"Error al crear usuario: {e}")
-                return None
-            finally:
-                conn.close()
-        return None
+            return nuevo_usuario_id
+        except sqlite3.IntegrityError:
+            print(f"Error: El usuario '{nombre}' ya existe.")
+            return None
+        except sqlite3.Error as e:
+            print(f"Error al crear usuario: {e}")
+            return None
 
     def obtener_usuario_por_id(self, user_id):
         """
@@ -91,7 +83,7 @@ class UsuarioController:
             Usuario: El objeto Usuario si se encuentra, None en caso contrario.
         """
         query = "SELECT * FROM usuarios WHERE id = ?"
-        conn = create_connection()
+        conn = get_connection()
         if conn is not None:
             try:
                 cursor = conn.cursor()
@@ -101,8 +93,6 @@ class UsuarioController:
                     return Usuario(id=user_data['id'], nombre=user_data['nombre'], nivel=user_data['nivel'], activo=user_data['activo'])
             except sqlite3.Error as e:
                 print(f"Error al obtener usuario: {e}")
-            finally:
-                conn.close()
         return None
 
     def obtener_todos_los_usuarios(self):
@@ -114,7 +104,7 @@ class UsuarioController:
         """
         query = "SELECT * FROM usuarios"
         usuarios = []
-        conn = create_connection()
+        conn = get_connection()
         if conn is not None:
             try:
                 cursor = conn.cursor()
@@ -124,6 +114,4 @@ class UsuarioController:
                     usuarios.append(Usuario(id=row['id'], nombre=row['nombre'], nivel=row['nivel'], activo=row['activo']))
             except sqlite3.Error as e:
                 print(f"Error al obtener todos los usuarios: {e}")
-            finally:
-                conn.close()
         return usuarios
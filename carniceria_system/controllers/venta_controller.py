@@ -1,24 +1,130 @@
 import sqlite3
-from ..utils.db_manager import create_connection
+import os
+import threading
+from ..utils.db_manager import transaction
+from ..utils.event_bus import event_bus, STOCK_CHANGED, VENTA_CREATED
 from .producto_controller import ProductoController
 from .logging_controller import LoggingController
 
+# Cantidad de números de ticket que cada terminal reserva de una vez.
+# Con 1 (por defecto) la numeración es estrictamente correlativa. Con varios
+# puntos de venta sobre la misma base, un valor mayor (ej. 50) hace que cada
+# terminal reserve un rango propio y numere sin competir por el contador;
+# los números quedan únicos pero no intercalados en orden de venta.
+TICKET_BLOCK_SIZE = max(1, int(os.environ.get('CARNICERIA_TICKET_BLOCK', '1')))
+
 class VentaController:
     """
     Controlador para gestionar las operaciones de ventas.
     """
+    # Rango de tickets reservado por este proceso: [siguiente, limite]
+    _bloque_tickets = None
+    _bloque_lock = threading.Lock()
+
     def __init__(self):
         self.producto_controller = ProductoController()
         self.logging_controller = LoggingController()
 
+    def _reservar_tickets(self, cursor, cantidad):
+        """
+        Incrementa el contador de tickets en `cantidad` y devuelve el último valor reservado.
+        El UPDATE toma el lock de escritura, por lo que dos terminales nunca
+        reciben el mismo rango.
+        """
+        cursor.execute("UPDATE secuencias SET valor = valor + ? WHERE nombre = 'ticket'", (cantidad,))
+        cursor.execute("SELECT valor FROM secuencias WHERE nombre = 'ticket'")
+        return cursor.fetchone()[0]
+
     def obtener_siguiente_numero_ticket(self, cursor):
         """
-        Obtiene el último número de ticket y devuelve el siguiente.
+        Asigna el siguiente número de ticket desde la tabla de secuencias, en O(1).
+        Este método espera un cursor de una transacción existente.
+        """
+        if TICKET_BLOCK_SIZE == 1:
+            return self._reservar_tickets(cursor, 1)
+
+        with VentaController._bloque_lock:
+            bloque = VentaController._bloque_tickets
+            if bloque is None or bloque[0] > bloque[1]:
+                limite = self._reservar_tickets(cursor, TICKET_BLOCK_SIZE)
+                bloque = [limite - TICKET_BLOCK_SIZE + 1, limite]
+                VentaController._bloque_tickets = bloque
+            numero = bloque[0]
+            bloque[0] += 1
+            return numero
+
+    def _descartar_bloque_tickets(self):
+        """
+        Descarta el rango reservado tras una venta fallida: la reserva pudo
+        revertirse junto con la transacción y otra terminal podría recibirlo.
+        """
+        with VentaController._bloque_lock:
+            VentaController._bloque_tickets = None
+
+    def actualizar_resumenes(self, cursor, venta_id):
+        """
+        Suma una venta recién insertada a las tablas de resumen diario.
         Este método espera un cursor de una transacción existente.
         """
-        cursor.execute("SELECT MAX(numero_ticket) FROM ventas")
-        max_ticket = cursor.fetchone()[0]
-        return (max_ticket or 0) + 1
+        cursor.execute("""
+            INSERT INTO resumen_ventas_producto (dia, producto_id, peso_total, subtotal_total, lineas)
+            SELECT DATE(v.fecha), dv.producto_id, SUM(dv.peso), SUM(dv.subtotal), COUNT(*)
+            FROM detalle_ventas dv
+            JOIN ventas v ON dv.venta_id = v.id
+            WHERE dv.venta_id = ?
+            GROUP BY dv.producto_id
+            ON CONFLICT(dia, producto_id) DO UPDATE SET
+                peso_total = peso_total + excluded.peso_total,
+                subtotal_total = subtotal_total + excluded.subtotal_total,
+                lineas = lineas + excluded.lineas
+        """, (venta_id,))
+        cursor.execute("""
+            INSERT INTO resumen_ventas_empleado (dia, empleado_id, num_ventas, total_ventas)
+            SELECT DATE(fecha), empleado_id, 1, total FROM ventas WHERE id = ?
+            ON CONFLICT(dia, empleado_id) DO UPDATE SET
+                num_ventas = num_ventas + excluded.num_ventas,
+                total_ventas = total_ventas + excluded.total_ventas
+        """, (venta_id,))
+        cursor.execute("""
+            INSERT INTO resumen_ventas_hora (dia, hora, forma_pago, num_ventas, total_ventas)
+            SELECT DATE(fecha), STRFTIME('%H', fecha), forma_pago, 1, total FROM ventas WHERE id = ?
+            ON CONFLICT(dia, hora, forma_pago) DO UPDATE SET
+                num_ventas = num_ventas + excluded.num_ventas,
+                total_ventas = total_ventas + excluded.total_ventas
+        """, (venta_id,))
+
+    def descontar_stock(self, cursor, venta_id, productos):
+        """
+        Descuenta del stock los kilos vendidos en una venta ya insertada.
+        Las líneas de un mismo producto se suman antes de comparar con el stock.
+        Este método espera un cursor de una transacción existente.
+
+        Args:
+            venta_id (int): ID de la venta con sus detalles ya insertados.
+            productos (dict): Nombres de los productos del carrito por ID,
+                              para informar cuáles no tienen stock.
+
+        Raises:
+            ValueError: Si algún producto no tiene stock suficiente.
+        """
+        cursor.execute("""
+            UPDATE productos
+            SET stock_actual = stock_actual - (
+                SELECT SUM(dv.peso) FROM detalle_ventas dv
+                WHERE dv.venta_id = ? AND dv.producto_id = productos.id
+            )
+            WHERE id IN (SELECT producto_id FROM detalle_ventas WHERE venta_id = ?)
+              AND stock_actual >= (
+                SELECT SUM(dv.peso) FROM detalle_ventas dv
+                WHERE dv.venta_id = ? AND dv.producto_id = productos.id
+            )
+            RETURNING id
+        """, (venta_id, venta_id, venta_id))
+        actualizados = {row[0] for row in cursor.fetchall()}
+
+        faltantes = [nombre for producto_id, nombre in productos.items() if producto_id not in actualizados]
+        if faltantes:
+            raise ValueError(f"Stock insuficiente para {', '.join(faltantes)}. Venta cancelada.")
 
     def crear_nueva_venta(self, empleado_id, turno, forma_pago, carrito):
         """
@@ -35,70 +141,61 @@ class VentaController:
         Returns:
             int: El número del ticket si la venta fue exitosa, None si falló.
         """
-        conn = create_connection()
-        if not conn:
-            print("Error: No se pudo conectar a la base de datos.")
-            return None
-
         total_venta = sum(item['subtotal'] for item in carrito)
 
         try:
-            cursor = conn.cursor()
-            # Iniciar transacción
-            cursor.execute("BEGIN TRANSACTION")
-
-            # 1. Obtener el nuevo número de ticket
-            nuevo_ticket = self.obtener_siguiente_numero_ticket(cursor)
-
-            # 2. Insertar la venta principal
-            query_venta = """
-            INSERT INTO ventas (numero_ticket, empleado_id, fecha, turno, total, forma_pago)
-            VALUES (?, ?, datetime('now', 'localtime'), ?, ?, ?)
-            """
-            cursor.execute(query_venta, (nuevo_ticket, empleado_id, turno, total_venta, forma_pago))
-            venta_id = cursor.lastrowid
-
-            # 3. Insertar los detalles de la venta y actualizar stock
-            query_detalle = """
-            INSERT INTO detalle_ventas (venta_id, producto_id, peso, precio_unitario, subtotal)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            for item in carrito:
-                producto = item['producto']
-                peso = item['peso']
-                subtotal = item['subtotal']
-
-                # Insertar detalle
-                cursor.execute(query_detalle, (venta_id, producto.id, peso, producto.precio_kg, subtotal))
-
-                # Actualizar stock (usando un método adaptado para transacciones)
-                # NOTA: Esto requiere modificar ProductoController para aceptar un cursor externo
-                # o realizar la operación de stock aquí directamente para mantener la atomicidad.
-                # Por simplicidad y seguridad, la haremos aquí.
-
-                cursor.execute("SELECT stock_actual FROM productos WHERE id = ?", (producto.id,))
-                stock_actual = cursor.fetchone()[0]
-
-                if stock_actual < peso:
-                    # Si esto ocurre, la transacción se revertirá.
-                    raise ValueError(f"Stock insuficiente para {producto.nombre}. Venta cancelada.")
-
-                nuevo_stock = stock_actual - peso
-                cursor.execute("UPDATE productos SET stock_actual = ? WHERE id = ?", (nuevo_stock, producto.id))
-
-            # Si todo fue bien, confirmar la transacción
-            conn.commit()
+            # Toda la venta se ejecuta en una única transacción
+            with transaction() as cursor:
+                # 1. Obtener el nuevo número de ticket
+                nuevo_ticket = self.obtener_siguiente_numero_ticket(cursor)
+
+                # 2. Insertar la venta principal
+                query_venta = """
+                INSERT INTO ventas (numero_ticket, empleado_id, fecha, turno, total, forma_pago)
+                VALUES (?, ?, datetime('now', 'localtime'), ?, ?, ?)
+                """
+                cursor.execute(query_venta, (nuevo_ticket, empleado_id, turno, total_venta, forma_pago))
+                venta_id = cursor.lastrowid
+
+                # 3. Insertar todos los detalles de la venta de una sola vez
+                query_detalle = """
+                INSERT INTO detalle_ventas (venta_id, producto_id, peso, precio_unitario, subtotal)
+                VALUES (?, ?, ?, ?, ?)
+                """
+                cursor.executemany(query_detalle, [
+                    (venta_id, item['producto'].id, item['peso'], item['producto'].precio_kg, item['subtotal'])
+                    for item in carrito
+                ])
+
+                # 4. Descontar el stock con una única sentencia. Sólo se actualizan
+                #    los productos con stock suficiente; si falta alguno, la
+                #    transacción se revierte.
+                self.descontar_stock(cursor, venta_id,
+                                     {item['producto'].id: item['producto'].nombre for item in carrito})
+
+                # 5. Acumular la venta en las tablas de resumen para los reportes
+                self.actualizar_resumenes(cursor, venta_id)
 
             # Registrar actividad
             log_msg = f"Venta registrada - Ticket: {nuevo_ticket}, Total: ${total_venta:,.2f}"
             self.logging_controller.log_activity(empleado_id, log_msg)
 
+            # Avisar a las otras vistas (stock, reportes) qué cambió
+            producto_ids = list({item['producto'].id for item in carrito})
+            event_bus.publish(STOCK_CHANGED, producto_ids=producto_ids)
+            event_bus.publish(VENTA_CREATED, numero_ticket=nuevo_ticket, total=total_venta,
+                              empleado_id=empleado_id, producto_ids=producto_ids)
+
             print(f"Venta #{nuevo_ticket} registrada exitosamente.")
             return nuevo_ticket
 
-        except (sqlite3.Error, ValueError) as e:
-            print(f"Error al registrar la venta. Reversando cambios. Error: {e}")
-            conn.rollback()
+        except BaseException as e:
+            # El gestor de la transacción ya revirtió los cambios, incluida la
+            # reserva de tickets, sea cual sea el error (ej. un ítem del
+            # carrito incompleto): el rango en memoria ya no es válido.
+            if TICKET_BLOCK_SIZE > 1:
+                self._descartar_bloque_tickets()
+            if not isinstance(e, (sqlite3.Error, ValueError)):
+                raise
+            print(f"Error al registrar la venta. Cambios revertidos. Error: {e}")
             return None
-        finally:
-            conn.close()
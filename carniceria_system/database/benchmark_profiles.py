@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import tempfile
+import time
+import sys
+import os
+
+# Añadir la raíz del proyecto al path para poder importar desde 'utils'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from carniceria_system.utils.db_manager import PERFORMANCE_PROFILES, apply_performance_profile
+
+# Parámetros del benchmark
+VENTAS_INICIALES = 20000
+COMMITS_MEDIDOS = 200
+LECTORES = 3
+DURACION_CONCURRENCIA = 2.0
+
+QUERY_REPORTE = """
+    SELECT STRFTIME('%H', fecha) as hora, SUM(total) as total_ventas
+    FROM ventas
+    GROUP BY hora
+"""
+QUERY_VENTA = """
+    INSERT INTO ventas (numero_ticket, empleado_id, fecha, turno, total, forma_pago)
+    VALUES (?, 1, datetime('now', 'localtime'), 'Mañana', ?, 'efectivo')
+"""
+
+def _open(path, profile):
+    """Abre una conexión con el perfil indicado (None = configuración por defecto de SQLite)."""
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    if profile is not None:
+        apply_performance_profile(conn, profile)
+    return conn
+
+def _crear_base(path, profile):
+    conn = _open(path, profile)
+    conn.execute("""
+        CREATE TABLE ventas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_ticket INTEGER NOT NULL UNIQUE,
+            empleado_id INTEGER NOT NULL,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            turno TEXT NOT NULL,
+            total REAL NOT NULL,
+            forma_pago TEXT NOT NULL
+        )
+    """)
+    conn.execute("BEGIN")
+    conn.executemany(QUERY_VENTA, ((i, 1000.0 + i % 500) for i in range(1, VENTAS_INICIALES + 1)))
+    conn.execute("COMMIT")
+    conn.close()
+
+def _medir_commits(conn, primer_ticket, cantidad):
+    """Registra `cantidad` ventas, una transacción cada una, y devuelve las latencias en ms."""
+    latencias = []
+    for ticket in range(primer_ticket, primer_ticket + cantidad):
+        inicio = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(QUERY_VENTA, (ticket, 1500.0))
+        conn.execute("COMMIT")
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+def _resumen(latencias):
+    ordenadas = sorted(latencias)
+    promedio = sum(ordenadas) / len(ordenadas)
+    p95 = ordenadas[int(len(ordenadas) * 0.95) - 1]
+    return promedio, p95
+
+def benchmark_perfil(profile):
+    """
+    Mide la latencia de commit y el throughput de lectores concurrentes para un perfil.
+
+    Returns:
+        dict: Métricas del perfil.
+    """
+    with tempfile.TemporaryDirectory() as carpeta:
+        path = os.path.join(carpeta, 'benchmark.db')
+        _crear_base(path, profile)
+
+        # 1. Latencia de commit sin competencia
+        escritor = _open(path, profile)
+        promedio, p95 = _resumen(_medir_commits(escritor, VENTAS_INICIALES + 1, COMMITS_MEDIDOS))
+
+        # 2. Lectores ejecutando reportes mientras el escritor registra ventas
+        detener = threading.Event()
+        consultas = [0] * LECTORES
+
+        def lector(indice):
+            conn = _open(path, profile)
+            while not detener.is_set():
+                try:
+                    conn.execute(QUERY_REPORTE).fetchall()
+                    consultas[indice] += 1
+                except sqlite3.OperationalError:
+                    pass # Base bloqueada por el escritor: se reintenta
+            conn.close()
+
+        hilos = [threading.Thread(target=lector, args=(i,)) for i in range(LECTORES)]
+        for hilo in hilos:
+            hilo.start()
+
+        inicio = time.perf_counter()
+        latencias_carga = []
+        ticket = VENTAS_INICIALES + COMMITS_MEDIDOS + 1
+        while time.perf_counter() - inicio < DURACION_CONCURRENCIA:
+            try:
+                latencias_carga.extend(_medir_commits(escritor, ticket, 1))
+            except sqlite3.OperationalError:
+                # Timeout esperando el lock: se descarta la venta y se continúa
+                if escritor.in_transaction:
+                    escritor.execute("ROLLBACK")
+            ticket += 1
+        transcurrido = time.perf_counter() - inicio
+
+        detener.set()
+        for hilo in hilos:
+            hilo.join()
+        escritor.close()
+
+    promedio_carga, p95_carga = _resumen(latencias_carga) if latencias_carga else (float('nan'), float('nan'))
+    return {
+        'commit_ms': promedio,
+        'commit_p95_ms': p95,
+        'commit_carga_ms': promedio_carga,
+        'commit_carga_p95_ms': p95_carga,
+        'lecturas_por_s': sum(consultas) / transcurrido,
+    }
+
+def run_benchmark():
+    """Ejecuta el benchmark para cada perfil y muestra una tabla comparativa."""
+    perfiles = [('sin perfil (rollback)', None)] + [(nombre, nombre) for nombre in PERFORMANCE_PROFILES]
+
+    print(f"{'Perfil':<24}{'commit ms':>11}{'p95':>9}{'commit c/lect. ms':>19}{'p95':>9}{'lecturas/s':>12}")
+    for etiqueta, profile in perfiles:
+        r = benchmark_perfil(profile)
+        print(f"{etiqueta:<24}{r['commit_ms']:>11.3f}{r['commit_p95_ms']:>9.3f}"
+              f"{r['commit_carga_ms']:>19.3f}{r['commit_carga_p95_ms']:>9.3f}{r['lecturas_por_s']:>12.1f}")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,113 @@
+import ast
+import glob
+import random
+import re
+import sqlite3
+import sys
+import os
+
+# Añadir la raíz del proyecto al path para poder importar desde 'utils'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from carniceria_system.database.schema import create_schema, rebuild_rollups
+
+CONTROLLERS_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'controllers')
+
+# Tablas que crecen con la operación diaria: una consulta que las recorra
+# completas (SCAN) se considera una regresión. Las tablas de catálogo
+# (productos, usuarios, media_res) son chicas y pueden recorrerse.
+HOT_TABLES = {'ventas', 'detalle_ventas', 'turnos', 'arqueos', 'desposte', 'logs',
+              'resumen_ventas_producto', 'resumen_ventas_empleado', 'resumen_ventas_hora'}
+
+# Consultas que recorren tablas grandes a propósito, identificadas por un
+# fragmento de su texto.
+ALLOWED_SCANS = set()
+
+SQL_PREFIXES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+def _seed(conn, ventas=5000):
+    """Crea el esquema y lo llena con datos representativos."""
+    cursor = conn.cursor()
+    create_schema(cursor)
+    random.seed(0)
+    cursor.executemany("INSERT INTO usuarios (nombre, password_hash, nivel) VALUES (?, 'x', 'empleado')",
+                       [(f"empleado{i}",) for i in range(10)])
+    cursor.executemany("INSERT INTO productos (nombre, codigo, precio_kg, stock_actual, fecha_ingreso) VALUES (?, ?, 1000, 100, '2024-01-01')",
+                       [(f"Corte {i}", f"C{i:03d}") for i in range(60)])
+    for i in range(1, ventas + 1):
+        fecha = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} {8 + i % 12:02d}:00:00"
+        cursor.execute("INSERT INTO ventas (numero_ticket, empleado_id, fecha, turno, total, forma_pago) VALUES (?, ?, ?, 'Mañana', 1000, 'efectivo')",
+                       (i, 1 + i % 10, fecha))
+        cursor.executemany("INSERT INTO detalle_ventas (venta_id, producto_id, peso, precio_unitario, subtotal) VALUES (?, ?, 1, 1000, 1000)",
+                           [(i, random.randint(1, 60)) for _ in range(3)])
+    cursor.executemany("INSERT INTO turnos (empleado_id, fecha, turno, hora_inicio, hora_fin, caja_inicial) VALUES (?, '2024-01-01', 'Mañana', '2024-01-01 08:00:00', '2024-01-01 14:00:00', 0)",
+                       [(1 + i % 10,) for i in range(500)])
+    cursor.executemany("INSERT INTO logs (usuario_id, actividad) VALUES (1, ?)", [(f"log {i}",) for i in range(5000)])
+    rebuild_rollups(cursor)
+    conn.commit()
+    conn.execute("ANALYZE")
+
+def collect_statements(folder=CONTROLLERS_FOLDER):
+    """
+    Extrae las sentencias SQL literales de los controladores.
+
+    Returns:
+        list[tuple]: Tuplas (archivo, línea, sql).
+    """
+    statements = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.py'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                sql = node.value.strip()
+                if sql.upper().startswith(SQL_PREFIXES):
+                    statements.append((os.path.basename(path), node.lineno, sql))
+    return statements
+
+def _aliases(sql):
+    """Devuelve un mapa alias -> tabla de las cláusulas FROM/JOIN/UPDATE/INTO."""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in ('WHERE', 'SET', 'ON', 'JOIN', 'GROUP', 'ORDER', 'LIMIT', 'VALUES', 'LEFT', 'INNER'):
+            aliases[alias] = table
+    return aliases
+
+def check_query_plans(conn):
+    """
+    Ejecuta EXPLAIN QUERY PLAN sobre cada sentencia de los controladores.
+
+    Returns:
+        list[str]: Descripción de cada consulta que recorre una tabla grande.
+    """
+    regressions = []
+    for filename, lineno, sql in collect_statements():
+        params = (None,) * sql.count('?')
+        try:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except sqlite3.Error as e:
+            regressions.append(f"{filename}:{lineno}: error al analizar la consulta: {e}")
+            continue
+
+        aliases = _aliases(sql)
+        for row in plan:
+            detail = row[3]
+            match = re.match(r'SCAN (\w+)', detail)
+            if not match or aliases.get(match.group(1), match.group(1)) not in HOT_TABLES:
+                continue
+            if any(fragment in sql for fragment in ALLOWED_SCANS):
+                continue
+            regressions.append(f"{filename}:{lineno}: {detail}\n    {' '.join(sql.split())}")
+    return regressions
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(':memory:')
+    _seed(conn)
+    regressions = check_query_plans(conn)
+    print(f"Sentencias analizadas: {len(collect_statements())}")
+    if regressions:
+        print("Consultas que recorren tablas completas:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("Ninguna consulta caliente recorre tablas completas.")
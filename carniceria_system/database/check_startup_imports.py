@@ -0,0 +1,74 @@
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Módulo que se importa para mostrar la pantalla de login (ver run_app.py).
+STARTUP_MODULE = 'carniceria_system.views.main_view'
+
+# Tiempo máximo, en milisegundos, que puede tardar la importación de
+# STARTUP_MODULE con todas sus dependencias.
+STARTUP_IMPORT_BUDGET_MS = 150
+
+# Módulos que no deben cargarse antes del login: se importan al abrir la
+# vista que los usa.
+DEFERRED_MODULES = ('matplotlib', 'numpy', 'pyarrow',
+                    'carniceria_system.views.main_app_view',
+                    'carniceria_system.views.stock_view',
+                    'carniceria_system.views.sales_view',
+                    'carniceria_system.views.reports_view',
+                    'carniceria_system.views.users_view',
+                    'carniceria_system.utils.backup_store')
+
+# Se toma la mejor de varias mediciones para no depender de la carga de la máquina.
+RUNS = 5
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def measure_imports(module=STARTUP_MODULE):
+    """
+    Importa `module` en un intérprete nuevo con `-X importtime`.
+
+    Returns:
+        tuple: (milisegundos acumulados de `module`, lista de módulos importados).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    total_us = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        modules.append(match.group(4))
+        if match.group(4) == module:
+            total_us = int(match.group(2))
+    return total_us / 1000, modules
+
+def check_startup_imports(runs=RUNS, budget_ms=STARTUP_IMPORT_BUDGET_MS):
+    """
+    Devuelve la lista de problemas encontrados (vacía si el inicio está dentro del presupuesto).
+    """
+    measurements = [measure_imports() for _ in range(runs)]
+    best_ms = min(ms for ms, _ in measurements)
+    modules = measurements[0][1]
+
+    problems = []
+    if best_ms > budget_ms:
+        problems.append(f"La importación de {STARTUP_MODULE} tarda {best_ms:.1f} ms (máximo {budget_ms} ms).")
+    for deferred in DEFERRED_MODULES:
+        if any(name == deferred or name.startswith(deferred + '.') for name in modules):
+            problems.append(f"'{deferred}' se importa antes del login.")
+    return best_ms, problems
+
+if __name__ == '__main__':
+    best_ms, problems = check_startup_imports()
+    print(f"Importación de {STARTUP_MODULE}: {best_ms:.1f} ms (máximo {STARTUP_IMPORT_BUDGET_MS} ms)")
+    if problems:
+        print("Problemas en el inicio de la aplicación:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("El inicio de la aplicación está dentro del presupuesto.")
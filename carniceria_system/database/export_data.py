@@ -0,0 +1,31 @@
+import argparse
+import sys
+import os
+
+# Añadir la raíz del proyecto al path para poder importar desde 'controllers'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from carniceria_system.controllers.exportacion_controller import ExportacionController, TABLAS, REPORTES, FORMATOS
+
+EXPORT_FOLDER = os.path.join(os.path.dirname(__file__), 'exports')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exporta ventas, arqueos y reportes de un período.")
+    parser.add_argument('desde', help="Primer día del período (YYYY-MM-DD).")
+    parser.add_argument('hasta', help="Último día del período, inclusive (YYYY-MM-DD).")
+    parser.add_argument('--tablas', nargs='+', choices=list(TABLAS) + list(REPORTES),
+                        help="Tablas y reportes a exportar (por defecto, todos).")
+    parser.add_argument('--formato', choices=FORMATOS, default='csv')
+    parser.add_argument('--carpeta', default=EXPORT_FOLDER, help="Carpeta de destino.")
+    args = parser.parse_args()
+
+    print(f"Exportando del {args.desde} al {args.hasta} en {os.path.abspath(args.carpeta)}...")
+    try:
+        resultados = ExportacionController().exportar_periodo(args.desde, args.hasta, args.carpeta,
+                                                              args.tablas, args.formato)
+    except (ImportError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+    for nombre, filas in resultados.items():
+        print(f"  {nombre}: {'error' if filas is None else f'{filas} filas'}")
+    if None in resultados.values():
+        sys.exit(1)
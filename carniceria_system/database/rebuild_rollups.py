@@ -0,0 +1,13 @@
+import sys
+import os
+
+# Añadir la raíz del proyecto al path para poder importar desde 'controllers'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from carniceria_system.controllers.reportes_controller import ReportesController
+
+if __name__ == '__main__':
+    print("Reconstruyendo tablas de resumen de ventas...")
+    if ReportesController().reconstruir_resumenes():
+        print("Resúmenes reconstruidos exitosamente.")
+    else:
+        sys.exit(1)
@@ -0,0 +1,335 @@
+import sqlite3
+
+# Definición del esquema de la base de datos.
+# Todas las sentencias son idempotentes (IF NOT EXISTS), de modo que pueden
+# ejecutarse sobre una base existente para incorporar objetos nuevos.
+
+TABLES = [
+    # Tabla de usuarios
+    '''
+    CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        nivel TEXT NOT NULL CHECK(nivel IN ('administrador', 'empleado')),
+        activo INTEGER NOT NULL DEFAULT 1
+    );
+    ''',
+
+    # Tabla de productos (cortes de carne)
+    '''
+    CREATE TABLE IF NOT EXISTS productos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL UNIQUE,
+        codigo TEXT UNIQUE,
+        precio_kg REAL NOT NULL,
+        stock_actual REAL NOT NULL DEFAULT 0.0,
+        stock_minimo REAL NOT NULL DEFAULT 5.0,
+        fecha_ingreso DATE NOT NULL,
+        dias_frescura INTEGER NOT NULL DEFAULT 7
+    );
+    ''',
+
+    # Tabla de registro de media res
+    '''
+    CREATE TABLE IF NOT EXISTS media_res (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha_llegada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        peso_inicial REAL NOT NULL,
+        costo REAL NOT NULL DEFAULT 0.0,
+        peso_despostado REAL DEFAULT 0.0,
+        merma_calculada REAL DEFAULT 0.0,
+        proveedor TEXT NOT NULL
+    );
+    ''',
+
+    # Tabla de desposte
+    '''
+    CREATE TABLE IF NOT EXISTS desposte (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        media_res_id INTEGER NOT NULL,
+        producto_id INTEGER NOT NULL,
+        peso REAL NOT NULL,
+        fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        empleado_id INTEGER NOT NULL,
+        FOREIGN KEY (media_res_id) REFERENCES media_res(id),
+        FOREIGN KEY (producto_id) REFERENCES productos(id),
+        FOREIGN KEY (empleado_id) REFERENCES usuarios(id)
+    );
+    ''',
+
+    # Tabla de ventas
+    '''
+    CREATE TABLE IF NOT EXISTS ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        numero_ticket INTEGER NOT NULL UNIQUE,
+        empleado_id INTEGER NOT NULL,
+        fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        turno TEXT NOT NULL,
+        total REAL NOT NULL,
+        forma_pago TEXT NOT NULL CHECK(forma_pago IN ('efectivo', 'transferencia', 'tarjeta'))
+    );
+    ''',
+
+    # Tabla de detalle de ventas
+    '''
+    CREATE TABLE IF NOT EXISTS detalle_ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        venta_id INTEGER NOT NULL,
+        producto_id INTEGER NOT NULL,
+        peso REAL NOT NULL,
+        precio_unitario REAL NOT NULL,
+        subtotal REAL NOT NULL,
+        FOREIGN KEY (venta_id) REFERENCES ventas(id),
+        FOREIGN KEY (producto_id) REFERENCES productos(id)
+    );
+    ''',
+
+    # Tabla de promociones
+    '''
+    CREATE TABLE IF NOT EXISTS promociones (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        descripcion TEXT NOT NULL,
+        tipo TEXT NOT NULL, -- 'cantidad', 'corte_especifico'
+        descuento REAL NOT NULL, -- Porcentaje o valor fijo
+        activa INTEGER NOT NULL DEFAULT 1,
+        fecha_inicio DATE,
+        fecha_fin DATE
+    );
+    ''',
+
+    # Tabla de turnos de empleados
+    '''
+    CREATE TABLE IF NOT EXISTS turnos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        empleado_id INTEGER NOT NULL,
+        fecha DATE NOT NULL,
+        turno TEXT NOT NULL, -- 'Mañana', 'Tarde'
+        hora_inicio TIMESTAMP NOT NULL,
+        hora_fin TIMESTAMP,
+        caja_inicial REAL NOT NULL,
+        caja_final REAL,
+        diferencia REAL,
+        FOREIGN KEY (empleado_id) REFERENCES usuarios(id)
+    );
+    ''',
+
+    # Tabla de arqueos de caja
+    '''
+    CREATE TABLE IF NOT EXISTS arqueos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        turno_id INTEGER NOT NULL,
+        efectivo_sistema REAL NOT NULL,
+        efectivo_fisico REAL NOT NULL,
+        transferencias REAL NOT NULL,
+        tarjetas REAL NOT NULL,
+        diferencia REAL NOT NULL,
+        FOREIGN KEY (turno_id) REFERENCES turnos(id)
+    );
+    ''',
+
+    # Tabla de logs de actividades críticas
+    '''
+    CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        usuario_id INTEGER,
+        actividad TEXT NOT NULL,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+    );
+    ''',
+
+    # Contadores para numeración correlativa (ej. números de ticket)
+    '''
+    CREATE TABLE IF NOT EXISTS secuencias (
+        nombre TEXT PRIMARY KEY,
+        valor INTEGER NOT NULL
+    );
+    ''',
+]
+
+# Valores iniciales de las secuencias. El contador de tickets arranca en el
+# último número usado, para bases que ya tienen ventas.
+SEQUENCES = [
+    "INSERT OR IGNORE INTO secuencias (nombre, valor) SELECT 'ticket', COALESCE(MAX(numero_ticket), 0) FROM ventas;",
+    "INSERT OR IGNORE INTO secuencias (nombre, valor) VALUES ('catalogo', 0);",
+]
+
+# Versión del catálogo: la secuencia 'catalogo' se incrementa con cualquier
+# cambio en 'productos' (también el stock que descuenta una venta). La caché
+# del catálogo la compara para saber si debe recargarse, sin depender de
+# escrituras en otras tablas.
+CATALOG_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_version_ai AFTER INSERT ON productos BEGIN
+        UPDATE secuencias SET valor = valor + 1 WHERE nombre = 'catalogo';
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_version_au AFTER UPDATE ON productos BEGIN
+        UPDATE secuencias SET valor = valor + 1 WHERE nombre = 'catalogo';
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_version_ad AFTER DELETE ON productos BEGIN
+        UPDATE secuencias SET valor = valor + 1 WHERE nombre = 'catalogo';
+    END;
+    """,
+]
+
+# Tablas de resumen (rollups) de ventas. Se actualizan en la misma transacción
+# que registra cada venta y permiten que los reportes lean pocas filas por día
+# en lugar de cada línea de ticket. 'dia' y 'hora' siguen el formato de
+# DATE(fecha) y STRFTIME('%H', fecha).
+ROLLUP_TABLES = {
+    'resumen_ventas_producto': '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_producto (
+        dia DATE NOT NULL,
+        producto_id INTEGER NOT NULL,
+        peso_total REAL NOT NULL DEFAULT 0.0,
+        subtotal_total REAL NOT NULL DEFAULT 0.0,
+        lineas INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, producto_id)
+    ) WITHOUT ROWID;
+    ''',
+    'resumen_ventas_empleado': '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_empleado (
+        dia DATE NOT NULL,
+        empleado_id INTEGER NOT NULL,
+        num_ventas INTEGER NOT NULL DEFAULT 0,
+        total_ventas REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (dia, empleado_id)
+    ) WITHOUT ROWID;
+    ''',
+    'resumen_ventas_hora': '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_hora (
+        dia DATE NOT NULL,
+        hora TEXT NOT NULL,
+        forma_pago TEXT NOT NULL,
+        num_ventas INTEGER NOT NULL DEFAULT 0,
+        total_ventas REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (dia, hora, forma_pago)
+    ) WITHOUT ROWID;
+    ''',
+}
+
+# Recalculan los rollups completos a partir de ventas y detalle_ventas.
+REBUILD_ROLLUPS = [
+    "DELETE FROM resumen_ventas_producto;",
+    """
+    INSERT INTO resumen_ventas_producto (dia, producto_id, peso_total, subtotal_total, lineas)
+    SELECT DATE(v.fecha), dv.producto_id, SUM(dv.peso), SUM(dv.subtotal), COUNT(*)
+    FROM detalle_ventas dv
+    JOIN ventas v ON dv.venta_id = v.id
+    GROUP BY DATE(v.fecha), dv.producto_id;
+    """,
+    "DELETE FROM resumen_ventas_empleado;",
+    """
+    INSERT INTO resumen_ventas_empleado (dia, empleado_id, num_ventas, total_ventas)
+    SELECT DATE(fecha), empleado_id, COUNT(*), SUM(total)
+    FROM ventas
+    GROUP BY DATE(fecha), empleado_id;
+    """,
+    "DELETE FROM resumen_ventas_hora;",
+    """
+    INSERT INTO resumen_ventas_hora (dia, hora, forma_pago, num_ventas, total_ventas)
+    SELECT DATE(fecha), STRFTIME('%H', fecha), forma_pago, COUNT(*), SUM(total)
+    FROM ventas
+    GROUP BY DATE(fecha), STRFTIME('%H', fecha), forma_pago;
+    """,
+]
+
+# Índices secundarios que usan las consultas de los controladores.
+INDEXES = [
+    # Reportes y cierre de turno filtran ventas por rango de fechas
+    "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha);",
+    # Detalles de una venta y ventas de un producto
+    "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_venta ON detalle_ventas (venta_id);",
+    "CREATE INDEX IF NOT EXISTS idx_detalle_ventas_producto ON detalle_ventas (producto_id);",
+    # Turno abierto de un empleado (hora_fin IS NULL), el más reciente primero
+    "CREATE INDEX IF NOT EXISTS idx_turnos_empleado_fin ON turnos (empleado_id, hora_fin, hora_inicio);",
+    # Turnos y arqueos de un período (exportación)
+    "CREATE INDEX IF NOT EXISTS idx_turnos_fecha ON turnos (fecha);",
+    # Arqueo de un turno
+    "CREATE INDEX IF NOT EXISTS idx_arqueos_turno ON arqueos (turno_id);",
+    # Cortes obtenidos de una media res
+    "CREATE INDEX IF NOT EXISTS idx_desposte_media_res ON desposte (media_res_id);",
+    # Listados de media res ordenados por llegada
+    "CREATE INDEX IF NOT EXISTS idx_media_res_llegada ON media_res (fecha_llegada);",
+    # Consulta de logs por fecha
+    "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp);",
+]
+
+# Índice de texto completo sobre el nombre y el código de los productos, para
+# la búsqueda por nombre. El tokenizador quita los acentos ("vacio" encuentra
+# "Vacío"). Es una tabla de contenido externo: guarda sólo el índice y los
+# triggers la mantienen sincronizada con 'productos'. El trigger de UPDATE se
+# limita a nombre y código para que las ventas (que cambian el stock) no
+# reescriban el índice.
+SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        nombre, codigo,
+        content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts (rowid, nombre, codigo) VALUES (new.id, new.nombre, new.codigo);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts (productos_fts, rowid, nombre, codigo) VALUES ('delete', old.id, old.nombre, old.codigo);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre, codigo ON productos BEGIN
+        INSERT INTO productos_fts (productos_fts, rowid, nombre, codigo) VALUES ('delete', old.id, old.nombre, old.codigo);
+        INSERT INTO productos_fts (rowid, nombre, codigo) VALUES (new.id, new.nombre, new.codigo);
+    END;
+    """,
+]
+
+def rebuild_rollups(cursor):
+    """
+    Recalcula todas las tablas de resumen de ventas desde cero.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor dentro de una transacción abierta.
+    """
+    for statement in REBUILD_ROLLUPS:
+        cursor.execute(statement)
+
+def create_schema(cursor):
+    """
+    Crea (o completa) las tablas e índices del sistema.
+
+    Si las tablas de resumen no existían, se llenan con el historial de ventas,
+    y el índice de búsqueda se construye con los productos existentes.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor sobre la base de datos a configurar.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for statement in TABLES + list(ROLLUP_TABLES.values()) + INDEXES + SEQUENCES + CATALOG_TRIGGERS:
+        cursor.execute(statement)
+
+    if not set(ROLLUP_TABLES) <= existing:
+        rebuild_rollups(cursor)
+
+    # Si SQLite se compiló sin FTS5, la búsqueda de productos usa el catálogo en memoria.
+    try:
+        cursor.execute("SAVEPOINT indice_busqueda")
+        for statement in SEARCH_INDEX:
+            cursor.execute(statement)
+        if 'productos_fts' not in existing:
+            cursor.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+        cursor.execute("RELEASE indice_busqueda")
+    except sqlite3.OperationalError as e:
+        cursor.execute("ROLLBACK TO indice_busqueda")
+        cursor.execute("RELEASE indice_busqueda")
+        print(f"Advertencia: no se pudo crear el índice de búsqueda de productos: {e}")
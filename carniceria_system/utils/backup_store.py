@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime
+
+from .db_manager import BACKUP_FOLDER, copy_database_online
+
+# Carpeta del almacén incremental, dentro de la carpeta de backups.
+INCREMENTAL_FOLDER = os.path.join(BACKUP_FOLDER, 'incremental')
+
+# Cada bloque agrupa varias páginas consecutivas de SQLite. Los bloques están
+# alineados a páginas, así que una venta nueva sólo cambia unos pocos bloques.
+PAGES_PER_CHUNK = 16
+
+# Política de retención por defecto: se conserva el backup más reciente de
+# cada una de las últimas N horas, días y meses.
+RETENTION_POLICY = {
+    'hourly': 24,
+    'daily': 30,
+    'monthly': 12,
+}
+
+_PERIOD_FORMATS = {
+    'hourly': '%Y-%m-%d %H',
+    'daily': '%Y-%m-%d',
+    'monthly': '%Y-%m',
+}
+
+class IncrementalBackupStore:
+    """
+    Almacén de backups incrementales y deduplicados de la base de datos.
+
+    Cada snapshot es un manifiesto JSON con la lista de hashes de sus bloques.
+    Los bloques se guardan comprimidos y direccionados por su SHA-256, de modo
+    que un bloque que no cambió desde el backup anterior no se vuelve a escribir.
+    """
+    def __init__(self, folder=INCREMENTAL_FOLDER, pages_per_chunk=PAGES_PER_CHUNK,
+                 retention=RETENTION_POLICY):
+        self.folder = folder
+        self.chunks_folder = os.path.join(folder, 'chunks')
+        self.snapshots_folder = os.path.join(folder, 'snapshots')
+        self.pages_per_chunk = pages_per_chunk
+        self.retention = retention
+
+    # --- Bloques ---
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunks_folder, digest[:2], digest)
+
+    def _write_chunk(self, digest, data):
+        """Guarda un bloque si no existe. Devuelve True si se escribió."""
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(data))
+        os.replace(tmp_path, path)
+        return True
+
+    def _read_chunk(self, digest):
+        with open(self._chunk_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"El bloque {digest} está corrupto.")
+        return data
+
+    # --- Snapshots ---
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.snapshots_folder, f"{snapshot_id}.json")
+
+    def _load_manifest(self, snapshot_id):
+        with open(self._manifest_path(snapshot_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_snapshots(self):
+        """
+        Devuelve los manifiestos de todos los snapshots, del más antiguo al más reciente.
+
+        Returns:
+            list[dict]: Manifiestos con 'id', 'created', 'size' y 'chunks'.
+        """
+        if not os.path.isdir(self.snapshots_folder):
+            return []
+        manifests = [self._load_manifest(name[:-5])
+                     for name in os.listdir(self.snapshots_folder) if name.endswith('.json')]
+        return sorted(manifests, key=lambda manifest: manifest['created'])
+
+    def create_snapshot(self, progress_callback=None, apply_retention=True):
+        """
+        Crea un snapshot incremental de la base de datos en uso.
+
+        Primero se obtiene una copia consistente con la API de backup online y
+        luego se divide en bloques; sólo se escriben los bloques nuevos.
+
+        Args:
+            progress_callback (callable, optional): Ver `copy_database_online()`.
+            apply_retention (bool): Si se aplica la política de retención al terminar.
+
+        Returns:
+            dict: Manifiesto del snapshot creado (incluye 'new_chunks' y
+                  'new_bytes'), o None si falló.
+        """
+        os.makedirs(self.snapshots_folder, exist_ok=True)
+        os.makedirs(self.chunks_folder, exist_ok=True)
+
+        previous = self.list_snapshots()
+        previous_chunks = previous[-1]['chunks'] if previous else []
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.db', dir=self.folder)
+        os.close(fd)
+        try:
+            copy_database_online(tmp_path, progress_callback)
+
+            conn = sqlite3.connect(tmp_path)
+            try:
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                conn.close()
+            chunk_size = page_size * self.pages_per_chunk
+
+            chunks = []
+            new_chunks = 0
+            new_bytes = 0
+            with open(tmp_path, 'rb') as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    digest = hashlib.sha256(data).hexdigest()
+                    index = len(chunks)
+                    unchanged = index < len(previous_chunks) and previous_chunks[index] == digest
+                    if not unchanged and self._write_chunk(digest, data):
+                        new_chunks += 1
+                        new_bytes += len(data)
+                    chunks.append(digest)
+            size = os.path.getsize(tmp_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error al crear el backup incremental: {e}")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        now = datetime.now()
+        snapshot_id = now.strftime("%Y-%m-%d_%H-%M-%S")
+        suffix = 1
+        while os.path.exists(self._manifest_path(snapshot_id)):
+            suffix += 1
+            snapshot_id = f"{now.strftime('%Y-%m-%d_%H-%M-%S')}_{suffix}"
+
+        manifest = {
+            'id': snapshot_id,
+            'created': now.isoformat(),
+            'page_size': page_size,
+            'chunk_size': chunk_size,
+            'size': size,
+            'chunks': chunks,
+        }
+        tmp_manifest = self._manifest_path(snapshot_id) + '.tmp'
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, self._manifest_path(snapshot_id))
+
+        print(f"Backup incremental '{snapshot_id}' creado: {new_chunks} bloques nuevos "
+              f"({new_bytes / 1024:,.1f} KiB) de {len(chunks)}.")
+
+        if apply_retention:
+            self.apply_retention()
+
+        manifest['new_chunks'] = new_chunks
+        manifest['new_bytes'] = new_bytes
+        return manifest
+
+    def restore_snapshot(self, snapshot_id, target_path):
+        """
+        Reconstruye la base de datos de un snapshot en `target_path`.
+
+        No restaura sobre la base en uso: el llamador decide dónde escribirla.
+
+        Args:
+            snapshot_id (str): ID del snapshot a restaurar.
+            target_path (str): Archivo destino.
+
+        Returns:
+            str: La ruta restaurada, o None si falló.
+        """
+        try:
+            manifest = self._load_manifest(snapshot_id)
+            tmp_path = target_path + '.restoring'
+            with open(tmp_path, 'wb') as f:
+                for digest in manifest['chunks']:
+                    f.write(self._read_chunk(digest))
+            os.replace(tmp_path, target_path)
+            return target_path
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"Error al restaurar el backup '{snapshot_id}': {e}")
+            return None
+
+    # --- Retención ---
+
+    def apply_retention(self):
+        """
+        Elimina los snapshots que no cubre la política de retención y los
+        bloques que ya no usa ningún snapshot. El snapshot más reciente
+        siempre se conserva.
+
+        Returns:
+            list[str]: IDs de los snapshots eliminados.
+        """
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            return []
+
+        keep = {snapshots[-1]['id']}
+        for rule, count in self.retention.items():
+            period_format = _PERIOD_FORMATS[rule]
+            periods = []
+            for manifest in reversed(snapshots):
+                period = datetime.fromisoformat(manifest['created']).strftime(period_format)
+                if period in periods:
+                    continue
+                if len(periods) >= count:
+                    break
+                periods.append(period)
+                keep.add(manifest['id'])
+
+        removed = []
+        for manifest in snapshots:
+            if manifest['id'] not in keep:
+                os.remove(self._manifest_path(manifest['id']))
+                removed.append(manifest['id'])
+
+        if removed:
+            self._collect_garbage()
+        return removed
+
+    def _collect_garbage(self):
+        """Borra los bloques que no referencia ningún snapshot."""
+        used = set()
+        for manifest in self.list_snapshots():
+            used.update(manifest['chunks'])
+        for prefix in os.listdir(self.chunks_folder):
+            prefix_folder = os.path.join(self.chunks_folder, prefix)
+            for name in os.listdir(prefix_folder):
+                if name not in used:
+                    os.remove(os.path.join(prefix_folder, name))
+
+def create_incremental_backup(progress_callback=None):
+    """
+    Crea un snapshot en el almacén incremental por defecto.
+    Tiene la misma firma que `backup_database()` para usarse con `backup_database_async()`.
+
+    Returns:
+        str: El ID del snapshot creado, o None si falló.
+    """
+    manifest = IncrementalBackupStore().create_snapshot(progress_callback)
+    return manifest['id'] if manifest else None
@@ -0,0 +1,80 @@
+import os
+
+# Formatos de etiquetas EAN-13 impresas por las balanzas del mostrador.
+# Las posiciones son rebanadas [inicio, fin) sobre los 13 dígitos; el último
+# dígito es siempre el verificador. Cada formato lleva el código del producto
+# (PLU de la balanza) y el peso o el importe de la etiqueta:
+#   - 'peso':   2P CCCCC WWWWW V  -> peso en gramos (3 decimales en kg)
+#   - 'precio': 2P CCCCC $$$$$ V  -> importe total con 'decimales' decimales
+BARCODE_LAYOUTS = {
+    'peso': {
+        'prefijos': ('20', '21', '22', '23', '24'),
+        'codigo': (2, 7),
+        'peso': (7, 12),
+        'decimales': 3,
+    },
+    'precio': {
+        'prefijos': ('25', '26', '27', '28', '29'),
+        'codigo': (2, 7),
+        'precio': (7, 12),
+        'decimales': 0,
+    },
+}
+
+# Formatos habilitados, en orden de prioridad. Se eligen con la variable de
+# entorno CARNICERIA_BARCODE_LAYOUTS (nombres separados por coma).
+ACTIVE_LAYOUTS = [name.strip() for name in
+                  os.environ.get('CARNICERIA_BARCODE_LAYOUTS', 'peso,precio').split(',')
+                  if name.strip() in BARCODE_LAYOUTS]
+
+def ean13_check_digit(digits):
+    """
+    Calcula el dígito verificador de los primeros 12 dígitos de un EAN-13.
+
+    Args:
+        digits (str): Los 12 dígitos sin el verificador.
+
+    Returns:
+        int: El dígito verificador.
+    """
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return (10 - total % 10) % 10
+
+def is_valid_ean13(code):
+    """Verifica que `code` tenga 13 dígitos y un dígito verificador correcto."""
+    return len(code) == 13 and code.isdigit() and ean13_check_digit(code) == int(code[12])
+
+def decode_scale_barcode(code, layouts=None):
+    """
+    Decodifica una etiqueta de balanza (EAN-13 con prefijo 2x).
+
+    Args:
+        code (str): El código leído por el escáner.
+        layouts (list, optional): Nombres de formatos a probar. Por defecto ACTIVE_LAYOUTS.
+
+    Returns:
+        dict: {'formato', 'codigo', 'peso'} o {'formato', 'codigo', 'precio'},
+              o None si el código no corresponde a ningún formato de balanza.
+
+    Raises:
+        ValueError: Si el código es de balanza pero su dígito verificador no es válido.
+    """
+    code = code.strip()
+    if len(code) != 13 or not code.isdigit():
+        return None
+
+    for name in (layouts if layouts is not None else ACTIVE_LAYOUTS):
+        layout = BARCODE_LAYOUTS[name]
+        if not code.startswith(layout['prefijos']):
+            continue
+        if not is_valid_ean13(code):
+            raise ValueError(f"El código '{code}' tiene un dígito verificador inválido.")
+
+        inicio, fin = layout['codigo']
+        result = {'formato': name, 'codigo': code[inicio:fin]}
+        for campo in ('peso', 'precio'):
+            if campo in layout:
+                inicio, fin = layout[campo]
+                result[campo] = int(code[inicio:fin]) / 10 ** layout['decimales']
+        return result
+    return None
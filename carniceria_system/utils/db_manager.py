@@ -1,5 +1,9 @@
 import sqlite3
 import os
+import threading
+import atexit
+from contextlib import contextmanager
+from ..database.schema import create_schema
 
 # La ruta a la base de datos se define de forma relativa al proyecto.
 # Se asume que el script se ejecuta desde la raíz del proyecto.
@@ -7,6 +11,66 @@ DB_NAME = 'carniceria.db'
 DB_FOLDER = 'carniceria_system/database'
 DATABASE_PATH = os.path.join(DB_FOLDER, DB_NAME)
 
+# Cantidad de sentencias preparadas que cada conexión mantiene compiladas.
+# Las consultas de los controladores son texto constante con parámetros '?',
+# por lo que se reutilizan en cada venta sin volver a compilarlas.
+STATEMENT_CACHE_SIZE = 256
+
+# Perfiles de rendimiento de SQLite. Cada uno es un conjunto de PRAGMA que se
+# aplica al abrir la conexión. Con journal_mode=WAL los lectores (por ejemplo
+# un reporte largo) no bloquean al escritor que registra una venta.
+#   - cache_size negativo se expresa en KiB.
+#   - busy_timeout en milisegundos: cuánto espera una conexión por un lock.
+PERFORMANCE_PROFILES = {
+    'pos': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -8000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'reporting': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+    },
+    'bulk-import': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -128000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+}
+
+# El perfil se elige con la variable de entorno CARNICERIA_DB_PROFILE.
+DEFAULT_PROFILE = os.environ.get('CARNICERIA_DB_PROFILE', 'pos')
+if DEFAULT_PROFILE not in PERFORMANCE_PROFILES:
+    print(f"Advertencia: perfil de base de datos '{DEFAULT_PROFILE}' desconocido, se usará 'pos'.")
+    DEFAULT_PROFILE = 'pos'
+
+def apply_performance_profile(conn, profile=DEFAULT_PROFILE):
+    """
+    Aplica los PRAGMA de un perfil de rendimiento a una conexión abierta.
+
+    Args:
+        conn (sqlite3.Connection): La conexión a configurar.
+        profile (str): Nombre de un perfil de PERFORMANCE_PROFILES.
+
+    Raises:
+        ValueError: Si el perfil no existe.
+    """
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(f"Perfil de base de datos desconocido: '{profile}'. "
+                         f"Opciones: {', '.join(PERFORMANCE_PROFILES)}")
+    for pragma, value in PERFORMANCE_PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma} = {value};")
+
 def create_connection():
     """
     Crea una conexión a la base de datos SQLite.
@@ -21,6 +85,7 @@ def create_connection():
         conn = sqlite3.connect(DATABASE_PATH)
         # Habilitar el soporte para claves foráneas
         conn.execute("PRAGMA foreign_keys = 1;")
+        apply_performance_profile(conn)
         conn.row_factory = sqlite3.Row # Permite acceder a las columnas por nombre
     except sqlite3.Error as e:
         print(f"Error al conectar con la base de datos: {e}")
@@ -28,13 +93,197 @@ def create_connection():
 
     return conn
 
-import shutil
+class ConnectionManager:
+    """
+    Mantiene una conexión persistente a la base de datos por cada hilo.
+
+    La conexión se abre la primera vez que un hilo la pide y se reutiliza en
+    las llamadas siguientes, de modo que los controladores no pagan la
+    apertura del archivo ni los PRAGMA en cada operación.
+    Las conexiones trabajan en modo autocommit; las escrituras que deben ser
+    atómicas se agrupan con `transaction()`.
+    La primera conexión del proceso completa el esquema (tablas e índices
+    nuevos) para que las bases existentes se actualicen sin pasos manuales.
+    """
+    def __init__(self, database_path=DATABASE_PATH, cached_statements=STATEMENT_CACHE_SIZE,
+                 profile=DEFAULT_PROFILE):
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(f"Perfil de base de datos desconocido: '{profile}'.")
+        self.database_path = database_path
+        self.cached_statements = cached_statements
+        self.profile = profile
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._schema_ready = False
+
+    def _open_connection(self):
+        folder = os.path.dirname(self.database_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(self.database_path,
+                               cached_statements=self.cached_statements,
+                               isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = 1;")
+        apply_performance_profile(conn, self.profile)
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            if not self._schema_ready:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    create_schema(conn.cursor())
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    conn.close()
+                    raise
+                self._schema_ready = True
+        return conn
+
+    def get_connection(self):
+        """
+        Devuelve la conexión del hilo actual, abriéndola si todavía no existe.
+
+        Returns:
+            sqlite3.Connection: La conexión reutilizable o None si ocurre un error.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        try:
+            conn = self._open_connection()
+        except sqlite3.Error as e:
+            print(f"Error al conectar con la base de datos: {e}")
+            return None
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, mode="IMMEDIATE"):
+        """
+        Ejecuta un bloque dentro de una transacción y devuelve un cursor.
+
+        Confirma los cambios si el bloque termina sin errores y los revierte
+        si se lanza una excepción, que se propaga al llamador. Si ya hay una
+        transacción abierta en la conexión del hilo, el bloque se suma a ella.
+
+        Args:
+            mode (str): Tipo de BEGIN ('DEFERRED', 'IMMEDIATE' o 'EXCLUSIVE').
+                        'IMMEDIATE' toma el lock de escritura al comenzar.
+        """
+        conn = self.get_connection()
+        if conn is None:
+            raise sqlite3.OperationalError("No se pudo conectar a la base de datos.")
+
+        cursor = conn.cursor()
+        if conn.in_transaction:
+            yield cursor
+            return
+
+        cursor.execute(f"BEGIN {mode}")
+        try:
+            yield cursor
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            try:
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+    def close_connection(self):
+        """Cierra la conexión del hilo actual, si existe."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close_all(self):
+        """Cierra todas las conexiones abiertas por cualquier hilo."""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+# Instancia compartida por todos los controladores del proceso.
+connection_manager = ConnectionManager()
+atexit.register(connection_manager.close_all)
+
+def get_connection():
+    """Devuelve la conexión persistente del hilo actual (ver ConnectionManager)."""
+    return connection_manager.get_connection()
+
+def transaction(mode="IMMEDIATE"):
+    """Atajo a `connection_manager.transaction()`."""
+    return connection_manager.transaction(mode)
+
+import time
 from datetime import datetime
 
-def backup_database():
+BACKUP_FOLDER = os.path.join(DB_FOLDER, 'backups')
+# El backup online copia la base en pasos de N páginas y hace una pausa entre
+# pasos, para que las ventas en curso nunca esperen al backup.
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.01
+
+def copy_database_online(destination_path, progress_callback=None,
+                         pages_per_step=BACKUP_PAGES_PER_STEP, step_sleep=BACKUP_STEP_SLEEP):
+    """
+    Copia la base de datos a `destination_path` con la API de backup online de SQLite.
+
+    La copia es consistente aunque el punto de venta esté escribiendo en la
+    base al mismo tiempo. Los errores de SQLite se propagan al llamador.
+
+    Args:
+        destination_path (str): Archivo destino (se sobrescribe).
+        progress_callback (callable, optional): Se llama tras cada paso con
+            (paginas_copiadas, paginas_totales).
+        pages_per_step (int): Páginas copiadas en cada paso.
+        step_sleep (float): Pausa en segundos entre pasos.
+    """
+    def _progress(status, remaining, total):
+        if progress_callback:
+            progress_callback(total - remaining, total)
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+
+    source = sqlite3.connect(DATABASE_PATH)
+    try:
+        destination = sqlite3.connect(destination_path)
+        try:
+            source.backup(destination, pages=pages_per_step, progress=_progress)
+        finally:
+            destination.close()
+    finally:
+        source.close()
+
+def backup_database(progress_callback=None, pages_per_step=BACKUP_PAGES_PER_STEP,
+                    step_sleep=BACKUP_STEP_SLEEP):
     """
     Crea una copia de seguridad de la base de datos en una subcarpeta 'backups'.
 
+    Usa la API de backup online de SQLite (ver `copy_database_online()`).
+
+    Args:
+        progress_callback (callable, optional): Se llama tras cada paso con
+            (paginas_copiadas, paginas_totales).
+        pages_per_step (int): Páginas copiadas en cada paso.
+        step_sleep (float): Pausa en segundos entre pasos.
+
     Returns:
         str: La ruta del archivo de backup si fue exitoso, None si falló.
     """
@@ -42,17 +291,48 @@ def backup_database():
         print("Error: La base de datos no existe, no se puede hacer backup.")
         return None
 
-    backup_folder = os.path.join(DB_FOLDER, 'backups')
-    os.makedirs(backup_folder, exist_ok=True)
+    os.makedirs(BACKUP_FOLDER, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     backup_filename = f"carniceria_backup_{timestamp}.db"
-    backup_path = os.path.join(backup_folder, backup_filename)
+    backup_path = os.path.join(BACKUP_FOLDER, backup_filename)
 
     try:
-        shutil.copyfile(DATABASE_PATH, backup_path)
+        copy_database_online(backup_path, progress_callback, pages_per_step, step_sleep)
         print(f"Copia de seguridad creada exitosamente en: {backup_path}")
         return backup_path
-    except IOError as e:
+    except sqlite3.Error as e:
         print(f"Error al crear la copia de seguridad: {e}")
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
         return None
+
+def backup_database_async(progress_callback=None, done_callback=None,
+                          backup_function=backup_database, **kwargs):
+    """
+    Ejecuta `backup_database()` (u otra función de backup con la misma firma)
+    en un hilo en segundo plano.
+
+    Los callbacks se invocan desde el hilo del backup, no desde el hilo de la
+    interfaz: las vistas de Tkinter deben trasladar el resultado con `after()`.
+
+    Args:
+        progress_callback (callable, optional): Ver `backup_database()`.
+        done_callback (callable, optional): Se llama al terminar con el resultado
+            de la función de backup (la ruta del backup), o None si falló.
+        backup_function (callable): Función que realiza el backup; recibe
+            `progress_callback` como primer argumento.
+        **kwargs: Parámetros adicionales para la función de backup.
+
+    Returns:
+        threading.Thread: El hilo que realiza el backup.
+    """
+    def _run():
+        result = backup_function(progress_callback, **kwargs)
+        if done_callback:
+            done_callback(result)
+
+    # No es daemon: si la aplicación se cierra, el backup termina antes de salir.
+    thread = threading.Thread(target=_run, name="backup-db")
+    thread.start()
+    return thread
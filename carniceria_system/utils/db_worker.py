@@ -0,0 +1,157 @@
+import queue
+import threading
+import traceback
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from .event_bus import event_bus
+
+# Hilos que atienden las llamadas a la base de datos hechas desde la interfaz.
+# Con dos, una venta no espera a que termine un reporte largo; SQLite sigue
+# serializando las escrituras (cada hilo usa su propia conexión).
+DB_WORKERS = 2
+
+# Cada cuántos milisegundos el hilo de Tkinter recoge los resultados.
+POLL_INTERVAL_MS = 30
+
+class DBWorker:
+    """
+    Ejecuta llamadas a los controladores fuera del hilo de Tkinter.
+
+    `submit()` devuelve un `concurrent.futures.Future` de inmediato, así la
+    ventana sigue respondiendo aunque la base esté bloqueada o un reporte tarde.
+    Los callbacks `on_done` / `on_error` se ejecutan siempre en el hilo de
+    Tkinter: los resultados se encolan y un ciclo de `after()` los entrega.
+    Mientras una tarea está en curso, la ventana muestra el cursor de espera.
+
+    Un resultado se descarta (sin llamar a los callbacks) si la tarea se
+    canceló con `cancel()` o si el widget asociado ya fue destruido.
+    """
+    def __init__(self, max_workers=DB_WORKERS, poll_interval=POLL_INTERVAL_MS):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._results = queue.Queue()
+        self._pending = set()
+        self._discarded = set()
+        self._busy = {}
+        self._root = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self, widget):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="db-worker")
+        if self._root is None:
+            self.attach(widget._root())
+
+    def attach(self, root):
+        """
+        Comienza a entregar resultados en la ventana principal `root`.
+
+        Los eventos del bus publicados desde los hilos de trabajo también se
+        entregan por esta vía, para que las vistas suscritas sólo toquen
+        widgets desde el hilo de Tkinter.
+        """
+        self._root = root
+        event_bus.set_dispatcher(self.call_in_ui)
+        root.after(self.poll_interval, self._poll)
+
+    def submit(self, widget, func, *args, on_done=None, on_error=None, **kwargs):
+        """
+        Ejecuta `func(*args, **kwargs)` en un hilo de trabajo.
+
+        Args:
+            widget (tk.Widget): Widget que pide la tarea. Su ventana muestra el
+                cursor de espera y, si se destruye antes, el resultado se descarta.
+            func (callable): Función a ejecutar (normalmente un método de un controlador).
+            on_done (callable, optional): Recibe el resultado, en el hilo de Tkinter.
+            on_error (callable, optional): Recibe la excepción, en el hilo de Tkinter.
+                Si no se indica, el error se muestra en la consola.
+
+        Returns:
+            concurrent.futures.Future: El resultado pendiente de la tarea.
+        """
+        self._ensure_started(widget)
+        window = widget.winfo_toplevel()
+        self._set_busy(window, 1)
+        future = self._executor.submit(func, *args, **kwargs)
+        self._pending.add(future)
+        future.add_done_callback(lambda f: self._results.put((f, on_done, on_error, widget, window)))
+        return future
+
+    def cancel(self, future):
+        """
+        Cancela una tarea. Si ya empezó a ejecutarse no se interrumpe, pero su
+        resultado se descarta.
+        """
+        if future is not None and future in self._pending and not future.cancel():
+            self._discarded.add(future)
+
+    def call_in_ui(self, func, *args, **kwargs):
+        """Encola `func` para ejecutarla en el hilo de Tkinter (seguro desde cualquier hilo)."""
+        self._results.put((None, lambda _: func(*args, **kwargs), None, None, None))
+
+    def shutdown(self):
+        """Espera a que terminen las tareas en curso y detiene los hilos."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _set_busy(self, window, delta):
+        count = self._busy.get(window, 0) + delta
+        if count > 0:
+            self._busy[window] = count
+        else:
+            self._busy.pop(window, None)
+        if _exists(window):
+            window.configure(cursor="watch" if count > 0 else "")
+
+    def _poll(self):
+        while True:
+            try:
+                future, on_done, on_error, widget, window = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if future is None:
+                self._deliver(on_done, None)
+                continue
+
+            self._set_busy(window, -1)
+            self._pending.discard(future)
+            discarded = future in self._discarded
+            self._discarded.discard(future)
+            if discarded or future.cancelled() or not _exists(widget):
+                continue
+
+            error = future.exception()
+            if error is None:
+                if on_done:
+                    self._deliver(on_done, future.result())
+            elif on_error:
+                self._deliver(on_error, error)
+            else:
+                print("Error en una tarea de base de datos:")
+                traceback.print_exception(error)
+
+        try:
+            self._root.after(self.poll_interval, self._poll)
+        except tk.TclError:
+            # La ventana principal se cerró: no hay dónde entregar resultados.
+            self._root = None
+            event_bus.set_dispatcher(None)
+
+    def _deliver(self, callback, value):
+        try:
+            callback(value)
+        except Exception:
+            print("Error al procesar el resultado de una tarea de base de datos:")
+            traceback.print_exc()
+
+def _exists(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False # La ventana principal ya fue destruida
+
+# Instancia compartida por todas las vistas.
+db_worker = DBWorker()
@@ -0,0 +1,84 @@
+import threading
+
+# Eventos que publican los controladores después de confirmar cada cambio.
+# Junto a cada uno, los datos que recibe el callback (como argumentos nombrados):
+#   STOCK_CHANGED         producto_ids (list[int])
+#   VENTA_CREATED         numero_ticket (int), total (float), empleado_id (int), producto_ids (list[int])
+#   MEDIA_RES_REGISTERED  media_res_id (int)
+#   MEDIA_RES_UPDATED     media_res_id (int)
+#   TURNO_CLOSED          turno_id (int), empleado_id (int)
+STOCK_CHANGED = 'stock_changed'
+VENTA_CREATED = 'venta_created'
+MEDIA_RES_REGISTERED = 'media_res_registered'
+MEDIA_RES_UPDATED = 'media_res_updated'
+TURNO_CLOSED = 'turno_closed'
+
+EVENTS = (STOCK_CHANGED, VENTA_CREATED, MEDIA_RES_REGISTERED, MEDIA_RES_UPDATED, TURNO_CLOSED)
+
+class EventBus:
+    """
+    Bus de publicación/suscripción dentro del proceso.
+
+    Permite que una vista se entere de los cambios hechos desde otra (por
+    ejemplo, que el stock refleje una venta) sin volver a leer tablas completas.
+    Los callbacks se ejecutan en el hilo que publica el evento, salvo que se
+    haya definido un despachador con `set_dispatcher()`: entonces los eventos
+    publicados fuera del hilo principal se entregan a través de él. Un error
+    en un suscriptor se informa y no impide notificar a los demás.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {event: [] for event in EVENTS}
+        self._dispatcher = None
+
+    def set_dispatcher(self, dispatcher):
+        """
+        Define cómo entregar los eventos publicados desde otros hilos.
+
+        Args:
+            dispatcher (callable): dispatcher(func, *args) debe ejecutar
+                func(*args) en el hilo principal. None para entregarlos
+                directamente en el hilo que publica.
+        """
+        self._dispatcher = dispatcher
+
+    def subscribe(self, event, callback):
+        """
+        Registra `callback` para un evento.
+
+        Returns:
+            callable: Función sin argumentos que cancela la suscripción.
+
+        Raises:
+            ValueError: Si el evento no existe.
+        """
+        if event not in self._subscribers:
+            raise ValueError(f"Evento desconocido: '{event}'.")
+        with self._lock:
+            self._subscribers[event].append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers[event]:
+                    self._subscribers[event].remove(callback)
+        return unsubscribe
+
+    def publish(self, event, **payload):
+        """Notifica un evento a todos sus suscriptores."""
+        dispatcher = self._dispatcher
+        if dispatcher is not None and threading.current_thread() is not threading.main_thread():
+            dispatcher(self._notify, event, payload)
+            return
+        self._notify(event, payload)
+
+    def _notify(self, event, payload):
+        with self._lock:
+            callbacks = list(self._subscribers[event])
+        for callback in callbacks:
+            try:
+                callback(**payload)
+            except Exception as e:
+                print(f"Error al notificar el evento '{event}': {e}")
+
+# Instancia compartida por todo el proceso.
+event_bus = EventBus()
@@ -0,0 +1,23 @@
+from datetime import date, timedelta
+
+def rango_semiabierto(start_date, end_date):
+    """
+    Convierte un rango de fechas inclusivo en un rango semiabierto de timestamps.
+
+    Las consultas filtran con `columna >= inicio AND columna < fin_exclusivo`
+    sobre la columna sin funciones, para que SQLite use su índice.
+    Las fechas se guardan como texto ISO, por lo que la comparación de
+    cadenas respeta el orden cronológico (también para timestamps).
+
+    Args:
+        start_date (date or str): Primer día del rango.
+        end_date (date or str): Último día del rango (inclusive).
+
+    Returns:
+        tuple: (inicio, fin_exclusivo) como cadenas 'YYYY-MM-DD'.
+    """
+    if isinstance(start_date, str):
+        start_date = date.fromisoformat(start_date)
+    if isinstance(end_date, str):
+        end_date = date.fromisoformat(end_date)
+    return start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from ..controllers.usuario_controller import UsuarioController
+from ..utils.db_worker import db_worker
 
 class LoginView(ttk.Frame):
     """
@@ -73,8 +74,8 @@ class LoginView(ttk.Frame):
         self.password_entry.bind("<Return>", self.attempt_login)
 
         # --- Botón de Login ---
-        login_button = ttk.Button(login_container, text="Iniciar Sesión", command=self.attempt_login, width=20)
-        login_button.grid(row=3, column=0, columnspan=2, pady=(20, 0))
+        self.login_button = ttk.Button(login_container, text="Iniciar Sesión", command=self.attempt_login, width=20)
+        self.login_button.grid(row=3, column=0, columnspan=2, pady=(20, 0))
 
     def attempt_login(self, event=None):
         """
@@ -87,8 +88,14 @@ class LoginView(ttk.Frame):
             messagebox.showerror("Error de Validación", "Por favor, ingrese usuario y contraseña.")
             return
 
-        usuario = self.usuario_controller.verificar_credenciales(username, password)
+        # Evitar intentos repetidos mientras se verifica en segundo plano
+        self.login_button.state(["disabled"])
+        db_worker.submit(self, self.usuario_controller.verificar_credenciales, username, password,
+                         on_done=self.on_login_checked,
+                         on_error=lambda e: self.on_login_checked(None))
 
+    def on_login_checked(self, usuario):
+        self.login_button.state(["!disabled"])
         if usuario:
             # Notificar al controlador principal que el login fue exitoso
             self.app_controller.on_login_success(usuario)
@@ -1,12 +1,15 @@
+import queue
+from datetime import date
 import tkinter as tk
 from tkinter import ttk, messagebox
-from ..utils.db_manager import backup_database
+from ..controllers.logging_controller import LoggingController
+from ..controllers.reportes_controller import ReportesController
+from ..utils.event_bus import event_bus, VENTA_CREATED
+from ..utils.db_worker import db_worker
 
-# Placeholder para las vistas que se crearán más adelante
-from .stock_view import StockView
-from .sales_view import SalesView
-from .reports_view import ReportsView
-from .users_view import UsersView
+# Las vistas de cada módulo se importan al abrirlas por primera vez, para que
+# el inicio de sesión no pague la carga de módulos que quizás no se usen
+# (por ejemplo, matplotlib para los reportes).
 
 class MainAppView(ttk.Frame):
     """
@@ -21,9 +24,18 @@ class MainAppView(ttk.Frame):
 
         self.grid(row=0, column=0, sticky="nsew")
 
+        self.welcome_summary = None
         self.create_widgets()
         self.bind_shortcuts()
 
+        # El resumen de la bienvenida se actualiza con cada venta, sin consultar la base
+        self._unsubscribe = event_bus.subscribe(VENTA_CREATED, self.on_venta_created)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self._unsubscribe()
+
     def create_widgets(self):
         # --- Configuración del Layout Principal ---
         # Fila 0 para la navegación, Fila 1 para el contenido
@@ -56,8 +68,8 @@ class MainAppView(ttk.Frame):
             users_button = ttk.Button(nav_frame, text="F4 Gestión de Usuarios", command=self.show_users_view, style="Nav.TButton")
             users_button.pack(side="left", padx=5)
 
-            backup_button = ttk.Button(nav_frame, text="Crear Backup", command=self.create_backup, style="Nav.TButton")
-            backup_button.pack(side="left", padx=5)
+            self.backup_button = ttk.Button(nav_frame, text="Crear Backup", command=self.create_backup, style="Nav.TButton")
+            self.backup_button.pack(side="left", padx=5)
 
         # --- Info de Usuario y Logout (Derecha) ---
         logout_button = ttk.Button(nav_frame, text="Cerrar Sesión", command=self.logout, style="Nav.TButton")
@@ -99,21 +111,50 @@ class MainAppView(ttk.Frame):
         welcome_label = ttk.Label(self.content_frame, text="Bienvenido al Sistema de Administración", font=("Helvetica", 24, "bold"), justify="center")
         welcome_label.place(relx=0.5, rely=0.5, anchor="center")
 
+        # Resumen de las ventas del día
+        self.ventas_hoy = None
+        self.welcome_summary = ttk.Label(self.content_frame, text="Cargando ventas de hoy...", font=("Helvetica", 14), justify="center")
+        self.welcome_summary.place(relx=0.5, rely=0.6, anchor="center")
+        today = date.today()
+        db_worker.submit(self.welcome_summary, ReportesController().get_rendimiento_empleados, today, today,
+                         on_done=self.show_welcome_summary)
+
+    def show_welcome_summary(self, empleados):
+        self.ventas_hoy = sum(row['num_ventas'] for row in empleados)
+        self.total_hoy = sum(row['total_ventas'] for row in empleados)
+        self.update_welcome_summary()
+
+    def update_welcome_summary(self):
+        if self.welcome_summary is not None and self.welcome_summary.winfo_exists():
+            self.welcome_summary.config(text=f"Ventas de hoy: {self.ventas_hoy}  -  Total: ${self.total_hoy:,.2f}")
+
+    def on_venta_created(self, total, **venta):
+        # Hasta que llegue el resumen inicial no hay totales que actualizar
+        if self.ventas_hoy is None or self.welcome_summary is None or not self.welcome_summary.winfo_exists():
+            return
+        self.ventas_hoy += 1
+        self.total_hoy += total
+        self.update_welcome_summary()
+
     def show_stock_view(self):
         print("Navegando a Gestión de Stock...")
-        self.set_content(StockView) # Se activará cuando StockView exista
+        from .stock_view import StockView
+        self.set_content(StockView)
 
     def show_sales_view(self):
         print("Navegando a Punto de Venta...")
-        self.set_content(SalesView) # Se activará cuando SalesView exista
+        from .sales_view import SalesView
+        self.set_content(SalesView)
 
     def show_reports_view(self):
         print("Navegando a Reportes...")
+        from .reports_view import ReportsView
         self.set_content(ReportsView)
 
     def show_users_view(self):
         print("Navegando a Gestión de Usuarios...")
-        self.set_content(UsersView) # Se activará cuando UsersView exista
+        from .users_view import UsersView
+        self.set_content(UsersView)
 
     def logout(self):
         """Notifica al controlador principal para volver a la pantalla de login."""
@@ -122,12 +163,68 @@ class MainAppView(ttk.Frame):
         self.app_controller.unbind("<F2>")
         self.app_controller.unbind("<F3>")
         self.app_controller.unbind("<F4>")
+        # Asegurar que el registro de actividades de la sesión quede escrito
+        LoggingController().flush(timeout=2.0)
         self.app_controller.show_login_view()
 
     def create_backup(self):
-        """Llama a la función de backup y muestra el resultado."""
-        path = backup_database()
-        if path:
-            messagebox.showinfo("Backup Exitoso", f"Copia de seguridad creada en:\n{path}")
+        """
+        Inicia un backup incremental en segundo plano y muestra su progreso.
+        La interfaz sigue respondiendo (y se pueden registrar ventas) mientras se copia.
+        """
+        from ..utils.db_manager import backup_database_async
+        from ..utils.backup_store import create_incremental_backup
+        self.backup_button.state(["disabled"])
+        self.backup_dialog = BackupProgressDialog(self)
+        self.backup_events = queue.Queue()
+
+        backup_database_async(
+            progress_callback=lambda copiadas, total: self.backup_events.put(("progreso", (copiadas, total))),
+            done_callback=lambda snapshot_id: self.backup_events.put(("fin", snapshot_id)),
+            backup_function=create_incremental_backup
+        )
+        self.after(100, self._poll_backup)
+
+    def _poll_backup(self):
+        """Procesa en el hilo de Tkinter los eventos enviados por el hilo del backup."""
+        try:
+            while True:
+                evento, dato = self.backup_events.get_nowait()
+                if evento == "progreso":
+                    self.backup_dialog.update_progress(*dato)
+                else:
+                    self._on_backup_finished(dato)
+                    return
+        except queue.Empty:
+            pass
+        self.after(100, self._poll_backup)
+
+    def _on_backup_finished(self, snapshot_id):
+        if not self.winfo_exists():
+            return # Se cerró la sesión mientras se copiaba; el resultado queda en la consola.
+        self.backup_dialog.destroy()
+        self.backup_button.state(["!disabled"])
+        if snapshot_id:
+            from ..utils.backup_store import INCREMENTAL_FOLDER
+            messagebox.showinfo("Backup Exitoso", f"Copia de seguridad '{snapshot_id}' creada en:\n{INCREMENTAL_FOLDER}")
         else:
             messagebox.showerror("Error de Backup", "No se pudo crear la copia de seguridad. Revise la consola para más detalles.")
+
+class BackupProgressDialog(tk.Toplevel):
+    """
+    Ventana que muestra el avance de un backup en curso.
+    """
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Creando Backup")
+        self.resizable(False, False)
+        self.transient(parent.winfo_toplevel())
+
+        self.status_var = tk.StringVar(value="Preparando copia de seguridad...")
+        ttk.Label(self, textvariable=self.status_var).pack(padx=20, pady=(15, 5))
+        self.progressbar = ttk.Progressbar(self, length=300, mode="determinate", maximum=1)
+        self.progressbar.pack(padx=20, pady=(0, 15))
+
+    def update_progress(self, copiadas, total):
+        self.progressbar.configure(maximum=max(total, 1), value=copiadas)
+        self.status_var.set(f"Copiando páginas: {copiadas} de {total}")
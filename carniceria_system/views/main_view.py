@@ -1,6 +1,6 @@
 import tkinter as tk
 from .login_view import LoginView
-from .main_app_view import MainAppView
+from ..utils.db_worker import db_worker
 
 class App(tk.Tk):
     """
@@ -19,6 +19,9 @@ class App(tk.Tk):
         self.current_user = None
         self._current_frame = None
 
+        # Las vistas consultan la base en segundo plano; los resultados llegan por esta ventana
+        db_worker.attach(self)
+
         # Iniciar mostrando la vista de login
         self.show_login_view()
 
@@ -57,6 +60,8 @@ class App(tk.Tk):
 
     def show_main_app_view(self):
         """Muestra la vista principal de la aplicación."""
+        # Se importa al iniciar sesión: la pantalla de login no la necesita
+        from .main_app_view import MainAppView
         self.show_frame(MainAppView, current_user=self.current_user)
 
     def run(self):
@@ -1,16 +1,17 @@
+import importlib.util
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
 from datetime import date, timedelta
-from ..controllers.reportes_controller import ReportesController
+from ..controllers.reportes_controller import ReportesController, CancelToken, ReporteCancelado
+from ..controllers.exportacion_controller import ExportacionController
+from ..utils.event_bus import event_bus, VENTA_CREATED
+from ..utils.db_worker import db_worker
 
 # --- Dependencia de Matplotlib ---
-# Se asume que matplotlib está instalado. Si no, se necesita: pip install matplotlib
-try:
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+# Si no está instalado, se necesita: pip install matplotlib
+# Aquí sólo se comprueba que exista; importarlo es lento, así que se carga
+# recién al dibujar el primer gráfico.
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec("matplotlib") is not None
 
 class ReportsView(ttk.Frame):
     """
@@ -30,9 +31,31 @@ class ReportsView(ttk.Frame):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
 
+        self._request = None
+        self._token = None
         self.create_widgets()
         self.refresh_reports() # Cargar reportes con el rango por defecto
 
+        # Una venta nueva sólo afecta a los reportes que incluyen el día de hoy
+        self._refresh_pending = None
+        self._unsubscribe = event_bus.subscribe(VENTA_CREATED, self.on_venta_created)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self._unsubscribe()
+            self.cancel_reports()
+
+    def on_venta_created(self, **venta):
+        if self.get_date_range()[1] < date.today() or self._refresh_pending:
+            return
+        # Varias ventas seguidas se agrupan en un solo refresco
+        self._refresh_pending = self.after_idle(self._refresh_after_event)
+
+    def _refresh_after_event(self):
+        self._refresh_pending = None
+        self.refresh_reports()
+
     def create_widgets(self):
         # --- Frame de Controles (Selector de Fecha) ---
         controls_frame = ttk.Frame(self, padding=10)
@@ -45,6 +68,12 @@ class ReportsView(ttk.Frame):
         period_selector.pack(side="left", padx=(0, 10))
         period_selector.bind("<<ComboboxSelected>>", lambda e: self.refresh_reports())
 
+        self.status_var = tk.StringVar()
+        ttk.Label(controls_frame, textvariable=self.status_var, foreground="gray").pack(side="left")
+
+        self.export_button = ttk.Button(controls_frame, text="Exportar a CSV...", command=self.export_period)
+        self.export_button.pack(side="right")
+
         # --- Notebook para las pestañas de reportes ---
         self.notebook = ttk.Notebook(self)
         self.notebook.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
@@ -57,12 +86,64 @@ class ReportsView(ttk.Frame):
         self.notebook.add(self.tab_empleados, text="Rendimiento de Empleados")
         self.notebook.add(self.tab_ventas, text="Ventas por Hora")
 
+        self.create_charts()
+
     def refresh_reports(self):
+        # Las consultas corren en segundo plano; si se cambia el período antes
+        # de que terminen, la consulta anterior se interrumpe.
+        self.cancel_reports()
+        start_date, end_date = self.get_date_range()
+        self.status_var.set("Cargando reportes...")
+        token = CancelToken(on_progress=lambda pasos: db_worker.call_in_ui(self.show_progress, token, pasos))
+        self._token = token
+        self._request = db_worker.submit(self, self.load_reports, start_date, end_date, token,
+                                         on_done=self.on_reports_loaded,
+                                         on_error=self.on_reports_error)
+
+    def cancel_reports(self):
+        """Interrumpe las consultas del reporte en curso, si hay alguno."""
+        if self._token:
+            self._token.cancel()
+        db_worker.cancel(self._request)
+        self._token = self._request = None
+
+    def show_progress(self, token, pasos):
+        if token is self._token and self.winfo_exists():
+            self.status_var.set(f"Cargando reportes... ({pasos:,} pasos)")
+
+    def load_reports(self, start_date, end_date, token):
+        """Consulta los datos de todas las pestañas (se ejecuta en segundo plano)."""
+        return {
+            'productos': self.controller.get_productos_mas_vendidos(start_date, end_date, token),
+            'empleados': self.controller.get_rendimiento_empleados(start_date, end_date, token),
+            'horas': self.controller.get_ventas_por_hora(start_date, end_date, token),
+        }
+
+    def on_reports_loaded(self, reportes):
+        self._request = self._token = None
+        self.status_var.set("")
+        self.plot_productos_mas_vendidos(*reportes['productos'])
+        self.plot_rendimiento_empleados(reportes['empleados'])
+        self.plot_ventas_por_hora(reportes['horas'])
+
+    def export_period(self):
+        """Exporta las ventas, arqueos y reportes del período elegido a una carpeta."""
+        carpeta = filedialog.askdirectory(parent=self, title="Carpeta de destino")
+        if not carpeta:
+            return
         start_date, end_date = self.get_date_range()
-        self.plot_productos_mas_vendidos(start_date, end_date)
-        # Aquí se llamarían las otras funciones de ploteo
-        # self.plot_rendimiento_empleados(start_date, end_date)
-        # self.plot_ventas_por_hora(start_date, end_date)
+        self.export_button.state(["disabled"])
+        db_worker.submit(self, ExportacionController().exportar_periodo, start_date, end_date, carpeta,
+                         on_done=lambda resultados: self.on_export_finished(carpeta, resultados),
+                         on_error=lambda e: self.on_export_finished(carpeta, None))
+
+    def on_export_finished(self, carpeta, resultados):
+        self.export_button.state(["!disabled"])
+        if resultados and None not in resultados.values():
+            detalle = "\n".join(f"{nombre}: {filas} filas" for nombre, filas in resultados.items())
+            messagebox.showinfo("Exportación", f"Archivos guardados en {carpeta}:\n{detalle}", parent=self)
+        else:
+            messagebox.showerror("Error", "No se pudieron exportar todos los datos del período.", parent=self)
 
     def get_date_range(self):
         period = self.period_var.get()
@@ -79,35 +160,87 @@ class ReportsView(ttk.Frame):
             start_of_week = today - timedelta(days=6)
             return start_of_week, today
 
-    def _clear_tab(self, tab):
-        for widget in tab.winfo_children():
-            widget.destroy()
-
-    def plot_productos_mas_vendidos(self, start_date, end_date):
-        self._clear_tab(self.tab_productos)
-
-        data_cantidad, data_valor = self.controller.get_productos_mas_vendidos(start_date, end_date)
-
-        if not data_cantidad:
-            ttk.Label(self.tab_productos, text="No hay datos de ventas de productos en este período.").pack(expand=True)
-            return
-
-        # --- Gráfico por Cantidad ---
-        fig_cantidad = Figure(figsize=(8, 4), dpi=100)
-        ax_cantidad = fig_cantidad.add_subplot(111)
-
-        nombres = [row['nombre'] for row in data_cantidad]
-        cantidades = [row['total_vendido'] for row in data_cantidad]
-
-        ax_cantidad.bar(nombres, cantidades, color='skyblue')
-        ax_cantidad.set_title('Top Productos por Cantidad Vendida (kg)')
-        ax_cantidad.set_ylabel('Kilogramos')
-        ax_cantidad.tick_params(axis='x', rotation=45)
-        fig_cantidad.tight_layout()
-
-        canvas_cantidad = FigureCanvasTkAgg(fig_cantidad, master=self.tab_productos)
-        canvas_cantidad.draw()
-        canvas_cantidad.get_tk_widget().pack(side="top", fill="both", expand=True, padx=10, pady=10)
+    def on_reports_error(self, error):
+        self._request = self._token = None
+        if isinstance(error, ReporteCancelado) and error.tiempo_agotado:
+            self.status_var.set("El reporte tardó demasiado. Pruebe con un período más corto.")
+        else:
+            self.status_var.set(f"No se pudieron cargar los reportes: {error}")
+
+    def create_charts(self):
+        """
+        Crea una figura por pestaña, una sola vez. Al cambiar el período sólo
+        se actualizan los datos de las barras (ver BarChart).
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.canvases = {}
+        axes = {}
+        for tab, rows in ((self.tab_productos, 2), (self.tab_empleados, 1), (self.tab_ventas, 1)):
+            figure = Figure(figsize=(8, 4 * rows), dpi=100, constrained_layout=True)
+            axes[tab] = [figure.add_subplot(rows, 1, i + 1) for i in range(rows)]
+            canvas = FigureCanvasTkAgg(figure, master=tab)
+            canvas.get_tk_widget().pack(side="top", fill="both", expand=True, padx=10, pady=10)
+            self.canvases[tab] = canvas
+
+        ax_cantidad, ax_valor = axes[self.tab_productos]
+        self.chart_cantidad = BarChart(ax_cantidad, 'Top Productos por Cantidad Vendida (kg)', 'Kilogramos', 'skyblue')
+        self.chart_valor = BarChart(ax_valor, 'Top Productos por Valor Vendido ($)', 'Pesos', 'seagreen')
+        self.chart_empleados = BarChart(axes[self.tab_empleados][0], 'Ventas por Empleado ($)', 'Pesos', 'orange')
+        self.chart_horas = BarChart(axes[self.tab_ventas][0], 'Ventas por Hora del Día ($)', 'Pesos', 'slateblue', rotation=0)
+
+    def plot_productos_mas_vendidos(self, data_cantidad, data_valor):
+        mensaje = "No hay datos de ventas de productos en este período."
+        self.chart_cantidad.update([row['nombre'] for row in data_cantidad],
+                                   [row['total_vendido'] for row in data_cantidad], mensaje)
+        self.chart_valor.update([row['nombre'] for row in data_valor],
+                                [row['total_valor'] for row in data_valor], mensaje)
+        self.canvases[self.tab_productos].draw_idle()
+
+    def plot_rendimiento_empleados(self, data):
+        self.chart_empleados.update([row['nombre'] for row in data],
+                                    [row['total_ventas'] for row in data],
+                                    "No hay ventas de empleados en este período.")
+        self.canvases[self.tab_empleados].draw_idle()
+
+    def plot_ventas_por_hora(self, data):
+        # Siempre las 24 horas, para que el eje no cambie entre períodos
+        por_hora = {int(row['hora']): row['total_ventas'] for row in data}
+        self.chart_horas.update([f"{hora:02d}" for hora in range(24)],
+                                [por_hora.get(hora, 0) for hora in range(24)],
+                                "No hay ventas en este período.")
+        self.canvases[self.tab_ventas].draw_idle()
+
+class BarChart:
+    """
+    Gráfico de barras que se actualiza sin volver a crear la figura.
 
-        # --- Gráfico por Valor ---
-        # (Se podría añadir un segundo gráfico de forma similar para data_valor)
+    Las barras creadas se reutilizan entre refrescos: se cambian sus alturas
+    y etiquetas, se ocultan las que sobran y sólo se agregan barras nuevas si
+    el período trae más elementos que los dibujados hasta ahora.
+    """
+    def __init__(self, ax, title, ylabel, color, rotation=45):
+        self.ax = ax
+        self.color = color
+        self.rotation = rotation
+        self.bars = []
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
+        self.empty_text = ax.text(0.5, 0.5, "", transform=ax.transAxes, ha="center", va="center")
+
+    def update(self, labels, values, empty_message=""):
+        """Muestra `values` con sus `labels`; si no hay valores, muestra `empty_message`."""
+        count = len(values)
+        if count > len(self.bars):
+            nuevas = range(len(self.bars), count)
+            self.bars.extend(self.ax.bar(nuevas, [0] * len(nuevas), color=self.color))
+        for i, bar in enumerate(self.bars):
+            bar.set_visible(i < count)
+            bar.set_height(values[i] if i < count else 0)
+
+        self.ax.set_xticks(range(count))
+        self.ax.set_xticklabels(labels, rotation=self.rotation, ha="right" if self.rotation else "center")
+        self.ax.set_xlim(-0.5, max(count, 1) - 0.5)
+        self.ax.set_ylim(0, max(values, default=0) * 1.1 or 1)
+        self.empty_text.set_text(empty_message if not count or not any(values) else "")
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ..controllers.producto_controller import ProductoController
 from ..controllers.venta_controller import VentaController
+from ..utils.db_worker import db_worker
 
 class SalesView(ttk.Frame):
     """
@@ -84,23 +85,56 @@ class SalesView(ttk.Frame):
         ttk.Radiobutton(payment_frame, text="Transferencia", variable=self.payment_method, value="transferencia").pack(anchor="w")
         ttk.Radiobutton(payment_frame, text="Tarjeta", variable=self.payment_method, value="tarjeta").pack(anchor="w")
 
-        finish_button = ttk.Button(payment_frame, text="FINALIZAR VENTA", command=self.finalize_sale, style="Accent.TButton")
-        finish_button.pack(fill="x", pady=20)
+        self.finish_button = ttk.Button(payment_frame, text="FINALIZAR VENTA", command=self.finalize_sale, style="Accent.TButton")
+        self.finish_button.pack(fill="x", pady=20)
 
-        cancel_button = ttk.Button(payment_frame, text="Cancelar Venta", command=self.clear_cart)
-        cancel_button.pack(fill="x")
+        self.cancel_button = ttk.Button(payment_frame, text="Cancelar Venta", command=self.clear_cart)
+        self.cancel_button.pack(fill="x")
 
-    def add_product_to_cart(self):
-        search_term = self.product_search_var.get()
-        weight = self.product_weight_var.get()
+        self.status_var = tk.StringVar()
+        ttk.Label(payment_frame, textvariable=self.status_var, foreground="gray").pack(anchor="w", pady=(10, 0))
 
+    def add_product_to_cart(self):
+        search_term = self.product_search_var.get().strip()
+        try:
+            weight = self.product_weight_var.get()
+        except tk.TclError:
+            weight = 0
+
+        db_worker.submit(self, self.lookup_product, search_term, weight,
+                         on_done=lambda producto_y_peso: self.on_product_found(search_term, *producto_y_peso),
+                         on_error=self.on_lookup_error)
+
+    def on_lookup_error(self, error):
+        if isinstance(error, ValueError):
+            messagebox.showerror("Etiqueta inválida", str(error))
+        else:
+            messagebox.showerror("Error", f"No se pudo buscar el producto: {error}")
+
+    def lookup_product(self, search_term, weight):
+        """
+        Busca el producto a agregar (se ejecuta en segundo plano).
+
+        Returns:
+            tuple: (Producto o None, peso).
+
+        Raises:
+            ValueError: Si el código es una etiqueta de balanza inválida.
+        """
+        # Etiqueta de balanza: el código ya trae el producto y el peso
+        etiqueta = self.producto_controller.buscar_por_etiqueta_balanza(search_term)
+        if etiqueta:
+            return etiqueta
         if not search_term or not weight or weight <= 0:
-            messagebox.showwarning("Datos incompletos", "Debe ingresar un término de búsqueda y un peso válido.")
-            return
+            return None, weight
+        return self.producto_controller.buscar_producto(search_term), weight
 
-        producto = self.producto_controller.buscar_producto(search_term)
+    def on_product_found(self, search_term, producto, weight):
         if not producto:
-            messagebox.showerror("Error", f"No se encontró ningún producto con el término '{search_term}'.")
+            if not search_term or not weight or weight <= 0:
+                messagebox.showwarning("Datos incompletos", "Debe ingresar un término de búsqueda y un peso válido.")
+            else:
+                messagebox.showerror("Error", f"No se encontró ningún producto con el término '{search_term}'.")
             return
 
         if producto.stock_actual < weight:
@@ -117,9 +151,10 @@ class SalesView(ttk.Frame):
         # Actualizar total
         self.update_total()
 
-        # Limpiar entradas
-        self.product_search_var.set("")
-        self.product_weight_var.set(0.0)
+        # Limpiar entradas, salvo que ya se haya escrito el próximo producto
+        if self.product_search_var.get().strip() == search_term:
+            self.product_search_var.set("")
+            self.product_weight_var.set(0.0)
         self.product_search_entry.focus()
 
     def update_total(self):
@@ -142,15 +177,23 @@ class SalesView(ttk.Frame):
         empleado_id = self.app_controller.current_user.id
         forma_pago = self.payment_method.get()
 
-        ticket_num = self.venta_controller.crear_nueva_venta(empleado_id, 'Mañana', forma_pago, self.current_cart)
+        # Mientras se registra la venta no se puede volver a finalizar ni vaciar el carrito
+        self.set_busy(True, "Registrando venta...")
+        db_worker.submit(self, self.venta_controller.crear_nueva_venta, empleado_id, 'Mañana', forma_pago, list(self.current_cart),
+                         on_done=self.on_sale_finished,
+                         on_error=lambda e: self.on_sale_finished(None))
+
+    def set_busy(self, busy, message=""):
+        state = ["disabled"] if busy else ["!disabled"]
+        self.finish_button.state(state)
+        self.cancel_button.state(state)
+        self.status_var.set(message)
 
+    def on_sale_finished(self, ticket_num):
+        self.set_busy(False)
         if ticket_num:
             messagebox.showinfo("Venta Exitosa", f"Venta registrada con éxito.\nTicket N°: {ticket_num}")
             self.clear_cart()
             # Aquí se podría implementar la impresión del ticket
         else:
             messagebox.showerror("Error en Venta", "Hubo un problema al registrar la venta. El stock no ha sido modificado.")
-
-        # Refrescar la lista de productos en la vista de stock si está visible
-        # (requiere una comunicación más avanzada entre vistas)
-        print("Es necesario implementar un sistema de pub/sub para actualizar otras vistas.")
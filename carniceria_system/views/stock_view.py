@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ..controllers.producto_controller import ProductoController
 from ..controllers.desposte_controller import DesposteController
+from ..utils.event_bus import event_bus, STOCK_CHANGED, MEDIA_RES_REGISTERED, MEDIA_RES_UPDATED
+from ..utils.db_worker import db_worker
+from .virtual_treeview import VirtualTreeview
 
 class StockView(ttk.Frame):
     """
@@ -20,6 +23,42 @@ class StockView(ttk.Frame):
 
         self.create_widgets()
 
+        # Los cambios hechos desde otras vistas actualizan sólo las filas afectadas
+        self._subscriptions = [
+            event_bus.subscribe(STOCK_CHANGED, self.on_stock_changed),
+            event_bus.subscribe(MEDIA_RES_REGISTERED, self.on_media_res_registered),
+            event_bus.subscribe(MEDIA_RES_UPDATED, self.on_media_res_updated),
+        ]
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            for unsubscribe in self._subscriptions:
+                unsubscribe()
+
+    def on_stock_changed(self, producto_ids):
+        db_worker.submit(self, lambda: [self.producto_controller.obtener_producto_por_id(producto_id)
+                                        for producto_id in producto_ids],
+                         on_done=self._refresh_productos)
+
+    def _refresh_productos(self, productos):
+        for producto in productos:
+            if not producto or self.cortes_tree.refresh_row(producto):
+                continue
+            # Producto nuevo dentro de lo ya cargado: se ubica en su lugar al
+            # recargar. Si cae más adelante, aparecerá al desplazar la lista.
+            if self.cortes_tree.exhausted or producto.nombre <= (self.cortes_tree.last_key or ''):
+                self.cortes_tree.reload()
+                return
+
+    def on_media_res_registered(self, media_res_id):
+        db_worker.submit(self, self.desposte_controller.obtener_media_res, media_res_id,
+                         on_done=lambda media_res: media_res and self.media_res_tree.prepend_row(media_res))
+
+    def on_media_res_updated(self, media_res_id):
+        db_worker.submit(self, self.desposte_controller.obtener_media_res, media_res_id,
+                         on_done=lambda media_res: media_res and self.media_res_tree.refresh_row(media_res))
+
     def create_widgets(self):
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
@@ -51,7 +90,17 @@ class StockView(ttk.Frame):
         tree_frame.grid_columnconfigure(0, weight=1)
 
         cols = ("id", "fecha", "proveedor", "peso_inicial", "costo", "peso_despostado", "merma")
-        self.media_res_tree = ttk.Treeview(tree_frame, columns=cols, show="headings")
+        # El historial se carga por páginas a medida que se desplaza la lista
+        self.media_res_tree = VirtualTreeview(
+            tree_frame, cols,
+            fetch_page=lambda despues_de, limite: self.desposte_controller.obtener_medias_res_pagina(despues_de, limite),
+            fetch_page_before=lambda antes_de, limite: self.desposte_controller.obtener_medias_res_pagina(limite=limite, antes_de=antes_de),
+            format_row=lambda mr: (
+                mr.id, mr.fecha_llegada.strftime("%Y-%m-%d"), mr.proveedor, f"{mr.peso_inicial:.2f} kg", f"${mr.costo:,.2f}", f"{mr.peso_despostado:.2f} kg", f"{mr.merma_calculada:.2f} kg"
+            ),
+            row_key=lambda mr: (mr.fecha_llegada, mr.id),
+            row_id=lambda mr: str(mr.id),
+        )
         for col in cols:
             self.media_res_tree.heading(col, text=col.replace("_", " ").title())
         self.media_res_tree.pack(fill="both", expand=True)
@@ -68,38 +117,34 @@ class StockView(ttk.Frame):
         tree_frame.grid_columnconfigure(0, weight=1)
 
         cols = ("id", "codigo", "nombre", "stock_actual", "precio_kg")
-        self.cortes_tree = ttk.Treeview(tree_frame, columns=cols, show="headings")
+        self.cortes_tree = VirtualTreeview(
+            tree_frame, cols,
+            fetch_page=lambda despues_de, limite: self.producto_controller.obtener_productos_pagina(despues_de, limite),
+            fetch_page_before=lambda antes_de, limite: self.producto_controller.obtener_productos_pagina(limite=limite, antes_de=antes_de),
+            format_row=lambda p: (p.id, p.codigo, p.nombre, f"{p.stock_actual:.3f} kg", f"${p.precio_kg:,.2f}"),
+            row_key=lambda p: p.nombre,
+            row_id=lambda p: str(p.id),
+        )
         for col in cols:
             self.cortes_tree.heading(col, text=col.replace("_", " ").title())
         self.cortes_tree.pack(fill="both", expand=True)
         self.load_cortes()
 
     def load_media_res(self):
-        for i in self.media_res_tree.get_children():
-            self.media_res_tree.delete(i)
-        for mr in self.desposte_controller.obtener_todas_las_medias_res():
-            self.media_res_tree.insert("", "end", values=(
-                mr.id, mr.fecha_llegada.strftime("%Y-%m-%d"), mr.proveedor, f"{mr.peso_inicial:.2f} kg", f"${mr.costo:,.2f}", f"{mr.peso_despostado:.2f} kg", f"{mr.merma_calculada:.2f} kg"
-            ))
+        self.media_res_tree.reload()
 
     def load_cortes(self):
-        for i in self.cortes_tree.get_children():
-            self.cortes_tree.delete(i)
-        for p in self.producto_controller.obtener_todos_los_productos():
-            self.cortes_tree.insert("", "end", values=(
-                p.id, p.codigo, p.nombre, f"{p.stock_actual:.3f} kg", f"${p.precio_kg:,.2f}"
-            ))
+        self.cortes_tree.reload()
 
     def open_new_arrival_dialog(self):
+        # La nueva fila llega por el evento MEDIA_RES_REGISTERED
         dialog = RegistrarMediaResDialog(self)
         dialog.wait_window()
-        self.load_media_res()
 
     def open_butcher_dialog(self):
+        # El stock y la media res se actualizan por los eventos del desposte
         dialog = RealizarDesposteDialog(self, self.app_controller.current_user.id)
         dialog.wait_window()
-        self.load_media_res()
-        self.load_cortes()
 
 class RegistrarMediaResDialog(tk.Toplevel):
     def __init__(self, parent):
@@ -118,18 +163,27 @@ class RegistrarMediaResDialog(tk.Toplevel):
         ttk.Label(self, text="Proveedor:").pack(padx=10, pady=5)
         ttk.Entry(self, textvariable=self.proveedor_var).pack(padx=10)
 
-        ttk.Button(self, text="Guardar", command=self.save).pack(pady=20)
+        self.save_button = ttk.Button(self, text="Guardar", command=self.save)
+        self.save_button.pack(pady=20)
 
     def save(self):
         peso = self.peso_var.get()
         costo = self.costo_var.get()
         proveedor = self.proveedor_var.get()
         if peso > 0 and costo > 0 and proveedor:
-            self.parent.desposte_controller.registrar_media_res(peso, costo, proveedor)
-            self.destroy()
+            self.save_button.state(["disabled"])
+            db_worker.submit(self, self.parent.desposte_controller.registrar_media_res, peso, costo, proveedor,
+                             on_done=self._on_saved)
         else:
             messagebox.showerror("Error", "Todos los campos son obligatorios.")
 
+    def _on_saved(self, media_res_id):
+        if media_res_id:
+            self.destroy()
+        else:
+            self.save_button.state(["!disabled"])
+            messagebox.showerror("Error", "No se pudo registrar la media res.", parent=self)
+
 class RealizarDesposteDialog(tk.Toplevel):
     def __init__(self, parent, empleado_id):
         super().__init__(parent)
@@ -144,33 +198,39 @@ class RealizarDesposteDialog(tk.Toplevel):
         top_frame.pack(padx=10, pady=10, fill="x")
         ttk.Label(top_frame, text="Seleccionar Media Res a Despostar:").pack(side="left")
         self.media_res_var = tk.StringVar()
-        medias_res_disponibles = self.parent.desposte_controller.obtener_medias_res_disponibles()
-        media_res_options = [f"ID: {mr.id} - {mr.fecha_llegada.strftime('%Y-%m-%d')}" for mr in medias_res_disponibles]
-        self.media_res_combo = ttk.Combobox(top_frame, textvariable=self.media_res_var, values=media_res_options, state="readonly")
+        self.media_res_combo = ttk.Combobox(top_frame, textvariable=self.media_res_var, state="readonly")
         self.media_res_combo.pack(side="left", padx=5)
+        db_worker.submit(self, self.parent.desposte_controller.obtener_medias_res_disponibles,
+                         on_done=lambda medias_res: self.media_res_combo.configure(values=[
+                             f"ID: {mr.id} - {mr.fecha_llegada.strftime('%Y-%m-%d')}" for mr in medias_res]))
 
         # Canvas para la lista de cortes
         canvas = tk.Canvas(self)
         scrollbar = ttk.Scrollbar(self, orient="vertical", command=canvas.yview)
         scrollable_frame = ttk.Frame(canvas)
+        self.scrollable_frame = scrollable_frame
 
         scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
 
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.save_button = ttk.Button(self, text="Guardar Desposte", command=self.save)
+        self.save_button.pack(pady=10)
+
         # Lista de cortes
-        productos = self.parent.producto_controller.obtener_todos_los_productos()
+        db_worker.submit(self, self.parent.producto_controller.obtener_todos_los_productos,
+                         on_done=self.create_cortes_entries)
+
+    def create_cortes_entries(self, productos):
         for i, prod in enumerate(productos):
-            ttk.Label(scrollable_frame, text=f"{prod.nombre}:").grid(row=i, column=0, sticky="w", padx=5, pady=2)
+            ttk.Label(self.scrollable_frame, text=f"{prod.nombre}:").grid(row=i, column=0, sticky="w", padx=5, pady=2)
             peso_var = tk.DoubleVar(value=0.0)
-            ttk.Entry(scrollable_frame, textvariable=peso_var).grid(row=i, column=1, padx=5)
+            ttk.Entry(self.scrollable_frame, textvariable=peso_var).grid(row=i, column=1, padx=5)
             self.entries[prod.id] = peso_var
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        ttk.Button(self, text="Guardar Desposte", command=self.save).pack(pady=10)
-
     def save(self):
         selected_mr_str = self.media_res_var.get()
         if not selected_mr_str:
@@ -189,7 +249,12 @@ class RealizarDesposteDialog(tk.Toplevel):
             messagebox.showwarning("Sin Datos", "No se ingresó peso para ningún corte.")
             return
 
-        success = self.parent.desposte_controller.realizar_desposte(media_res_id, cortes, self.empleado_id)
+        self.save_button.state(["disabled"])
+        db_worker.submit(self, self.parent.desposte_controller.realizar_desposte, media_res_id, cortes, self.empleado_id,
+                         on_done=self._on_saved)
+
+    def _on_saved(self, success):
+        self.save_button.state(["!disabled"])
         if success:
             messagebox.showinfo("Éxito", "El desposte se registró correctamente.")
             self.destroy()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from ..controllers.usuario_controller import UsuarioController
+from ..utils.db_worker import db_worker
 
 class UsersView(ttk.Frame):
     """
@@ -64,11 +65,13 @@ class UsersView(ttk.Frame):
         scrollbar.grid(row=0, column=1, sticky="ns")
 
     def load_users(self):
-        """Carga o recarga los usuarios en el Treeview."""
+        """Carga o recarga los usuarios en el Treeview (la consulta corre en segundo plano)."""
+        db_worker.submit(self, self.usuario_controller.obtener_todos_los_usuarios, on_done=self.show_users)
+
+    def show_users(self, usuarios):
         for i in self.tree.get_children():
             self.tree.delete(i)
 
-        usuarios = self.usuario_controller.obtener_todos_los_usuarios()
         for u in usuarios:
             estado = "Activo" if u.activo == 1 else "Inactivo"
             self.tree.insert("", tk.END, values=(u.id, u.nombre, u.nivel.title(), estado), tags=(estado,))
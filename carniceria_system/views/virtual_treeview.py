@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+from tkinter import ttk
+from ..utils.db_worker import db_worker
+
+# Filas que se piden al origen de datos en cada página.
+PAGE_SIZE = 100
+
+# Cuando la parte visible pasa esta fracción de la lista, se carga la página
+# siguiente (y, simétricamente, la anterior al acercarse al principio).
+PREFETCH_THRESHOLD = 0.9
+
+# Páginas que se mantienen cargadas a la vez. Al cargar una más, se descarta
+# la del extremo opuesto y se vuelve a pedir si el usuario regresa.
+MAX_PAGES = 5
+
+class VirtualTreeview(ttk.Frame):
+    """
+    Treeview con barra de desplazamiento que carga sus filas por páginas.
+
+    Al abrirse sólo se piden las filas de la primera página; a medida que el
+    usuario se acerca al final de la lista se pide la siguiente. El origen de
+    datos usa paginación por clave (keyset): recibe la clave de la última fila
+    cargada y devuelve las que siguen, de modo que cada página cuesta lo mismo
+    sin importar cuánto historial haya. Las páginas se piden en segundo plano
+    (ver DBWorker), así la lista se puede seguir usando mientras llegan.
+
+    Si se indica `fetch_page_before`, sólo se mantienen `max_pages` páginas
+    en el Treeview: al avanzar se descartan las del principio y al volver se
+    piden de nuevo por clave, así la memoria no crece con el desplazamiento.
+    Sin esa función las páginas sólo se agregan.
+
+    Args:
+        parent: Widget contenedor.
+        columns (tuple): Identificadores de las columnas.
+        fetch_page (callable): fetch_page(despues_de, limite) -> list de filas.
+            `despues_de` es None para la primera página.
+        format_row (callable): Convierte una fila en la tupla de valores a mostrar.
+        row_key (callable): Devuelve la clave de paginación de una fila.
+        row_id (callable, optional): Devuelve el iid de la fila en el Treeview.
+        fetch_page_before (callable, optional): fetch_page_before(antes_de, limite)
+            -> list con las filas inmediatamente anteriores a la clave `antes_de`,
+            en el mismo orden en que se muestran.
+        page_size (int): Filas por página.
+        max_pages (int): Páginas cargadas a la vez (con `fetch_page_before`).
+        background (bool): Si es False, las páginas se piden en el hilo de
+            Tkinter (para orígenes de datos cuya conexión no admite otros hilos).
+        **tree_options: Opciones adicionales para ttk.Treeview.
+    """
+    def __init__(self, parent, columns, fetch_page, format_row, row_key, row_id=None,
+                 fetch_page_before=None, page_size=PAGE_SIZE, max_pages=MAX_PAGES,
+                 background=True, **tree_options):
+        super().__init__(parent)
+        self.fetch_page = fetch_page
+        self.fetch_page_before = fetch_page_before
+        self.format_row = format_row
+        self.row_key = row_key
+        self.row_id = row_id
+        self.page_size = page_size
+        self.max_pages = max_pages if fetch_page_before else None
+        self.background = background
+
+        tree_options.setdefault('show', 'headings')
+        self.tree = ttk.Treeview(self, columns=columns, yscrollcommand=self._on_scroll, **tree_options)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # Páginas cargadas, en orden: {'iids': [...], 'first': clave, 'last': clave}
+        self._pages = []
+        self._at_start = True
+        self._exhausted = False
+        self._pending = None
+        self._request = None
+
+    @property
+    def last_key(self):
+        """Clave de la última fila cargada (None si todavía no hay filas)."""
+        return self._pages[-1]['last'] if self._pages else None
+
+    @property
+    def exhausted(self):
+        """True si ya se cargaron todas las filas del origen de datos."""
+        return self._exhausted
+
+    # Atajos al Treeview interno
+    def heading(self, column, **options):
+        return self.tree.heading(column, **options)
+
+    def column(self, column, **options):
+        return self.tree.column(column, **options)
+
+    def bind_tree(self, sequence, func):
+        return self.tree.bind(sequence, func)
+
+    def refresh_row(self, row):
+        """
+        Vuelve a dibujar una fila ya cargada (requiere `row_id`).
+
+        Returns:
+            bool: True si la fila estaba cargada, False si no.
+        """
+        iid = self.row_id(row)
+        if not self.tree.exists(iid):
+            return False
+        self.tree.item(iid, values=self.format_row(row))
+        return True
+
+    def prepend_row(self, row):
+        """
+        Agrega una fila nueva al principio de la lista (ej. el registro más reciente).
+        Si el principio de la lista no está cargado, la fila aparecerá al volver a él.
+        """
+        if not self._at_start:
+            return
+        iid = self._insert_row(row, 0)
+        key = self.row_key(row)
+        if self._pages:
+            self._pages[0]['iids'].insert(0, iid)
+            self._pages[0]['first'] = key
+        else:
+            self._pages.append({'iids': [iid], 'first': key, 'last': key})
+
+    def reload(self):
+        """Descarta las filas cargadas y vuelve a pedir la primera página."""
+        if self._pending:
+            self.after_cancel(self._pending)
+            self._pending = None
+        db_worker.cancel(self._request)
+        self._request = None
+        self.tree.delete(*self.tree.get_children())
+        self._pages = []
+        self._at_start = True
+        self._exhausted = False
+        self.load_next_page()
+
+    def load_next_page(self):
+        """Pide la página siguiente; las filas se agregan cuando llegan."""
+        self._pending = None
+        if self._exhausted or self._request is not None:
+            return
+        self._fetch(self.fetch_page, self.last_key, self._append_page)
+
+    def load_previous_page(self):
+        """Vuelve a pedir la página anterior a las cargadas, si se descartó."""
+        self._pending = None
+        if self._at_start or self._request is not None or not self._pages:
+            return
+        self._fetch(self.fetch_page_before, self._pages[0]['first'], self._prepend_page)
+
+    def _fetch(self, fetch, key, on_done):
+        if not self.background:
+            on_done(fetch(key, self.page_size))
+            return
+        self._request = db_worker.submit(self, fetch, key, self.page_size,
+                                         on_done=on_done, on_error=self._on_page_error)
+
+    def _insert_row(self, row, index):
+        options = {'values': self.format_row(row)}
+        if self.row_id:
+            options['iid'] = self.row_id(row)
+        return self.tree.insert("", index, **options)
+
+    def _append_page(self, rows):
+        self._request = None
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if not rows:
+            return
+        iids = [self._insert_row(row, "end") for row in rows]
+        self._pages.append({'iids': iids, 'first': self.row_key(rows[0]), 'last': self.row_key(rows[-1])})
+        if self.max_pages and len(self._pages) > self.max_pages:
+            with self._keep_view():
+                self.tree.delete(*self._pages.pop(0)['iids'])
+            self._at_start = False
+
+    def _prepend_page(self, rows):
+        self._request = None
+        if len(rows) < self.page_size:
+            self._at_start = True
+        if not rows:
+            return
+        with self._keep_view():
+            iids = [self._insert_row(row, index) for index, row in enumerate(rows)]
+            self._pages.insert(0, {'iids': iids, 'first': self.row_key(rows[0]), 'last': self.row_key(rows[-1])})
+            if len(self._pages) > self.max_pages:
+                self.tree.delete(*self._pages.pop()['iids'])
+                self._exhausted = False
+
+    @contextmanager
+    def _keep_view(self):
+        """Mantiene en pantalla la misma fila superior mientras se agregan o quitan filas."""
+        children = self.tree.get_children()
+        anchor = None
+        if children:
+            top = min(int(self.tree.yview()[0] * len(children) + 0.5), len(children) - 1)
+            anchor = children[top]
+        yield
+        if anchor and self.tree.exists(anchor):
+            self.tree.yview_moveto(self.tree.index(anchor) / len(self.tree.get_children()))
+
+    def _on_page_error(self, error):
+        self._request = None
+        print(f"Error al cargar la lista: {error}")
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._pending or self._request is not None:
+            return
+        # También se dispara cuando todas las filas entran en pantalla (last == 1.0),
+        # lo que llena la vista si la primera página resultó corta para la ventana.
+        if not self._exhausted and float(last) >= PREFETCH_THRESHOLD:
+            self._pending = self.after_idle(self.load_next_page)
+        elif not self._at_start and float(first) <= 1 - PREFETCH_THRESHOLD:
+            self._pending = self.after_idle(self.load_previous_page)
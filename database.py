@@ -7,6 +7,9 @@ class DatabaseManager:
     def __init__(self, db_name="carniceria.db"):
         self.conn = sqlite3.connect(db_name)
         self.cursor = self.conn.cursor()
+        # Caché de productos por código de barras (ver buscar_producto_por_codigo)
+        self._productos_por_codigo = {}
+        self._version_productos = None
         self.crear_tablas()
         self._insertar_datos_iniciales()
 
@@ -55,6 +58,9 @@ class DatabaseManager:
             )
         ''')
 
+        # Índice para recorrer el historial de media res por fecha
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_historial_media_res_fecha ON historial_media_res (fecha)")
+
         self.conn.commit()
 
     def _insertar_datos_iniciales(self):
@@ -117,22 +123,65 @@ class DatabaseManager:
             for p in productos
         ]
 
+    def obtener_productos_pagina(self, despues_de_id=None, limite=100, antes_de_id=None):
+        # Paginación por clave: la página siguiente empieza después del último ID mostrado.
+        # Con antes_de_id se piden los anteriores (para volver a una página descartada).
+        if antes_de_id is not None:
+            self.cursor.execute('''
+                SELECT * FROM (
+                    SELECT p.id, p.nombre, c.nombre, p.precio_por_kg, p.stock_actual
+                    FROM productos p
+                    JOIN categorias c ON p.categoria_id = c.id
+                    WHERE p.id < ?
+                    ORDER BY p.id DESC
+                    LIMIT ?
+                ) ORDER BY 1
+            ''', (antes_de_id, limite))
+        else:
+            self.cursor.execute('''
+                SELECT p.id, p.nombre, c.nombre, p.precio_por_kg, p.stock_actual
+                FROM productos p
+                JOIN categorias c ON p.categoria_id = c.id
+                WHERE p.id > ?
+                ORDER BY p.id
+                LIMIT ?
+            ''', (despues_de_id or 0, limite))
+        return [
+            {
+                'id': p[0],
+                'nombre': p[1],
+                'categoria_nombre': p[2],
+                'precio_por_kg': p[3],
+                'stock_actual': p[4]
+            }
+            for p in self.cursor.fetchall()
+        ]
+
     def buscar_producto_por_codigo(self, codigo):
-        self.cursor.execute('''
-            SELECT p.id, p.nombre, c.nombre, p.precio_por_kg, p.stock_actual
-            FROM productos p
-            JOIN categorias c ON p.categoria_id = c.id
-            WHERE p.codigo_barras = ?
-        ''', (codigo,))
-        producto = self.cursor.fetchone()
+        # Los productos se leen una vez y se guardan en memoria. La caché se
+        # descarta cuando cambia PRAGMA data_version (otra conexión confirmó
+        # cambios) o total_changes (esta conexión modificó datos).
+        version = (self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes)
+        if version != self._version_productos:
+            self._productos_por_codigo = {}
+            self.cursor.execute('''
+                SELECT p.codigo_barras, p.id, p.nombre, c.nombre, p.precio_por_kg, p.stock_actual
+                FROM productos p
+                JOIN categorias c ON p.categoria_id = c.id
+            ''')
+            for producto in self.cursor.fetchall():
+                self._productos_por_codigo[producto[0]] = {
+                    'id': producto[1],
+                    'nombre': producto[2],
+                    'categoria_nombre': producto[3],
+                    'precio_por_kg': producto[4],
+                    'stock_actual': producto[5]
+                }
+            self._version_productos = None if self.conn.in_transaction else version
+
+        producto = self._productos_por_codigo.get(codigo)
         if producto:
-            return {
-                'id': producto[0],
-                'nombre': producto[1],
-                'categoria_nombre': producto[2],
-                'precio_por_kg': producto[3],
-                'stock_actual': producto[4]
-            }
+            return dict(producto)
         return None
 
     def obtener_categorias(self):
@@ -194,5 +243,55 @@ class DatabaseManager:
             for h in historial
         ]
         
+    def obtener_historial_media_res_pagina(self, despues_de=None, limite=100, antes_de=None):
+        # despues_de es la clave (fecha, id) del último registro de la página anterior;
+        # antes_de, la del primero de una página descartada que se vuelve a pedir
+        if antes_de is not None:
+            self.cursor.execute('''
+                SELECT * FROM (
+                    SELECT * FROM historial_media_res
+                    WHERE (fecha, id) > (?, ?)
+                    ORDER BY fecha ASC, id ASC
+                    LIMIT ?
+                ) ORDER BY fecha DESC, id DESC
+            ''', (antes_de[0], antes_de[1], limite))
+        elif despues_de is None:
+            self.cursor.execute("SELECT * FROM historial_media_res ORDER BY fecha DESC, id DESC LIMIT ?", (limite,))
+        else:
+            self.cursor.execute('''
+                SELECT * FROM historial_media_res
+                WHERE (fecha, id) < (?, ?)
+                ORDER BY fecha DESC, id DESC
+                LIMIT ?
+            ''', (despues_de[0], despues_de[1], limite))
+        return [
+            {'id': h[0], 'fecha': h[1], 'peso': h[2], 'costo_por_kg': h[3], 'total_media_res': h[4]}
+            for h in self.cursor.fetchall()
+        ]
+
+    def obtener_historial_ventas_pagina(self, despues_de_id=None, limite=100, antes_de_id=None):
+        # Ventas de la más reciente a la más antigua, paginadas por ID
+        if antes_de_id is not None:
+            self.cursor.execute('''
+                SELECT * FROM (
+                    SELECT id, fecha_hora, monto_total, cantidad_articulos
+                    FROM ventas_reportes WHERE id > ? ORDER BY id ASC LIMIT ?
+                ) ORDER BY id DESC
+            ''', (antes_de_id, limite))
+        elif despues_de_id is None:
+            self.cursor.execute('''
+                SELECT id, fecha_hora, monto_total, cantidad_articulos
+                FROM ventas_reportes ORDER BY id DESC LIMIT ?
+            ''', (limite,))
+        else:
+            self.cursor.execute('''
+                SELECT id, fecha_hora, monto_total, cantidad_articulos
+                FROM ventas_reportes WHERE id < ? ORDER BY id DESC LIMIT ?
+            ''', (despues_de_id, limite))
+        return [
+            {'numero_venta': v[0], 'fecha_venta': v[1], 'total': v[2], 'cantidad_items': v[3], 'productos': None}
+            for v in self.cursor.fetchall()
+        ]
+
     def __del__(self):
         self.conn.close()
\ No newline at end of file
@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 from database import DatabaseManager
 from StockManagerUI import StockManagerUI
 from SalesUI import SalesUI
+from carniceria_system.views.virtual_treeview import VirtualTreeview
 
 class CarniceriaApp(tk.Tk):
     def __init__(self):
@@ -112,7 +113,22 @@ class CarniceriaApp(tk.Tk):
         frame_tabla_historial.pack(fill="both", expand=True)
         
         columns_historial = ("numero", "fecha", "total", "items", "productos")
-        tree_historial = ttk.Treeview(frame_tabla_historial, columns=columns_historial, show="headings", height=15)
+        # El historial se carga por páginas a medida que se desplaza la lista
+        tree_historial = VirtualTreeview(
+            frame_tabla_historial, columns_historial,
+            fetch_page=self.db_manager.obtener_historial_ventas_pagina,
+            fetch_page_before=lambda antes_de, limite: self.db_manager.obtener_historial_ventas_pagina(limite=limite, antes_de_id=antes_de),
+            format_row=lambda venta: (
+                venta['numero_venta'],
+                venta['fecha_venta'][:16] if venta['fecha_venta'] else '',
+                f"${venta['total']:.2f}",
+                venta['cantidad_items'] or 0,
+                venta['productos'] if venta['productos'] else 'Sin productos'
+            ),
+            row_key=lambda venta: venta['numero_venta'],
+            background=False, # La conexión de DatabaseManager es del hilo de Tkinter
+            height=15,
+        )
         
         headers_historial = ["Número Venta", "Fecha", "Total", "Items", "Productos"]
         widths_historial = [120, 150, 100, 80, 300]
@@ -121,31 +137,17 @@ class CarniceriaApp(tk.Tk):
             tree_historial.heading(col, text=header, anchor="center")
             tree_historial.column(col, width=width, minwidth=width, anchor="center" if col != "productos" else "w")
             
-        scrollbar_v_historial = ttk.Scrollbar(frame_tabla_historial, orient="vertical", command=tree_historial.yview)
-        scrollbar_h_historial = ttk.Scrollbar(frame_tabla_historial, orient="horizontal", command=tree_historial.xview)
-        
-        tree_historial.configure(yscrollcommand=scrollbar_v_historial.set, xscrollcommand=scrollbar_h_historial.set)
+        scrollbar_h_historial = ttk.Scrollbar(frame_tabla_historial, orient="horizontal", command=tree_historial.tree.xview)
+        tree_historial.tree.configure(xscrollcommand=scrollbar_h_historial.set)
         
         tree_historial.grid(row=0, column=0, sticky="nsew")
-        scrollbar_v_historial.grid(row=0, column=1, sticky="ns")
         scrollbar_h_historial.grid(row=1, column=0, sticky="ew")
         
         frame_tabla_historial.grid_rowconfigure(0, weight=1)
         frame_tabla_historial.grid_columnconfigure(0, weight=1)
         
         try:
-            ventas = self.db_manager.obtener_historial_ventas(limite=50)
-            for venta in ventas:
-                fecha_formateada = venta['fecha_venta'][:16] if venta['fecha_venta'] else ''
-                productos_texto = venta['productos'] if venta['productos'] else 'Sin productos'
-                
-                tree_historial.insert("", "end", values=(
-                    venta['numero_venta'],
-                    fecha_formateada,
-                    f"${venta['total']:.2f}",
-                    venta['cantidad_items'] or 0,
-                    productos_texto
-                ))
+            tree_historial.reload()
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar historial: {str(e)}")
 